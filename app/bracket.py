@@ -0,0 +1,172 @@
+# =========================
+# Elimination brackets
+# =========================
+#
+# Builds a bracket layout for a battle's elimination matches, so the
+# template can place every match without searching (tournament rounds
+# may be round-robin, so they are left out). Matches come in play order
+# (round_order, match_order); a participant's appearance in a later
+# match is an advancement edge from their previous match. The edge
+# taken by a match's winner decides the tree; edges taken by losers
+# (third-place matches) are kept but don't affect layout.
+#
+# Positions are grid cells: `column` counts from the first round and
+# each first-round match takes ROW_SPAN rows, with later matches
+# centred between the matches that feed them.
+
+BRACKET_ROUND_TYPES = ("elimination",)
+
+ROW_SPAN = 2
+
+COLUMN_NAMES_FROM_END = ("Final", "Semifinals", "Quarterfinals")
+
+
+def _is_winner(participant) -> bool:
+    return participant["status"] == "advanced" or participant["placement"] == 1
+
+
+def build_bracket(rows):
+    # rows: one per match participant (or per empty match), carrying
+    # round_id, round_order, round_name, match_id, match_order, title,
+    # participant_key, name, placement, score and status.
+    if not rows:
+        return None
+
+    matches = {}
+    round_index = {}
+
+    for row in rows:
+        round_index.setdefault(row["round_id"], len(round_index))
+
+        match = matches.get(row["match_id"])
+        if match is None:
+            match = matches[row["match_id"]] = {
+                "id": row["match_id"],
+                "title": row["title"],
+                "round_id": row["round_id"],
+                "round_name": row["round_name"],
+                "column": 0,
+                "row": 0,
+                "next_match_id": None,
+                "feeder_ids": [],
+                "participants": [],
+                "_keys": [],
+            }
+
+        if row["participant_key"] is not None:
+            match["participants"].append({
+                "name": row["name"],
+                "placement": row["placement"],
+                "score": row["score"],
+                "status": row["status"],
+                "winner": False,
+            })
+            match["_keys"].append(row["participant_key"])
+
+    ordered = list(matches.values())
+
+    # =========================
+    # 1️⃣ Advancement edges
+    # =========================
+    edges = []
+    last_match = {}
+
+    for match in ordered:
+        flagged = any(_is_winner(p) for p in match["participants"])
+
+        for key, participant in zip(match["_keys"], match["participants"]):
+            previous = last_match.get(key)
+            last_match[key] = match
+
+            if previous is None or previous is match:
+                continue
+
+            previous_index = previous["_keys"].index(key)
+            came_as_winner = previous["participants"][previous_index]["winner"]
+
+            # Unflagged results: the first participant to move on from a
+            # match is taken as its winner.
+            if (
+                not came_as_winner
+                and not previous["_flagged"]
+                and previous["next_match_id"] is None
+            ):
+                previous["participants"][previous_index]["winner"] = True
+                came_as_winner = True
+
+            kind = "winner" if came_as_winner else "loser"
+            edges.append({"from": previous["id"], "to": match["id"], "kind": kind})
+
+            if kind == "winner" and previous["next_match_id"] is None:
+                previous["next_match_id"] = match["id"]
+                match["feeder_ids"].append(previous["id"])
+
+        match["_flagged"] = flagged
+        for participant in match["participants"]:
+            if flagged and _is_winner(participant):
+                participant["winner"] = True
+
+    # =========================
+    # 2️⃣ Columns
+    # =========================
+    for match in ordered:
+        feeder_columns = [matches[f]["column"] + 1 for f in match["feeder_ids"]]
+        match["column"] = max([round_index[match["round_id"]], *feeder_columns])
+
+    # =========================
+    # 3️⃣ Rows
+    # =========================
+    next_row = 0
+
+    def place(match):
+        nonlocal next_row
+
+        feeders = [matches[f] for f in match["feeder_ids"]]
+
+        if not feeders:
+            match["row"] = next_row
+            next_row += ROW_SPAN
+            return
+
+        for feeder in feeders:
+            place(feeder)
+
+        match["row"] = (feeders[0]["row"] + feeders[-1]["row"]) // 2
+
+    # Trees first, so lone matches (third place) sit below them.
+    roots = [m for m in ordered if m["next_match_id"] is None]
+
+    for match in sorted(roots, key=lambda m: not m["feeder_ids"]):
+        place(match)
+
+    # =========================
+    # 4️⃣ Shape columns
+    # =========================
+    column_count = max(m["column"] for m in ordered) + 1
+    columns = [{"index": c, "name": None, "matches": []} for c in range(column_count)]
+
+    for match in ordered:
+        del match["_keys"], match["_flagged"]
+        columns[match["column"]]["matches"].append(match)
+
+    multi_round = len(round_index) > 1
+
+    for column in columns:
+        column["matches"].sort(key=lambda m: m["row"])
+        round_names = {m["round_name"] for m in column["matches"]}
+
+        from_end = column_count - 1 - column["index"]
+
+        if multi_round and len(round_names) == 1:
+            column["name"] = round_names.pop()
+        elif from_end < len(COLUMN_NAMES_FROM_END):
+            column["name"] = COLUMN_NAMES_FROM_END[from_end]
+        else:
+            column["name"] = f"Round {column['index'] + 1}"
+
+    return {
+        "round_ids": list(round_index),
+        "columns": columns,
+        "rows": next_row,
+        "edges": edges,
+    }
@@ -0,0 +1,554 @@
+import asyncio
+import base64
+import hashlib
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from functools import wraps
+
+import orjson
+
+
+# =========================
+# Query result cache
+# =========================
+#
+# Cached values live in named namespaces (one per @cached query function,
+# plus one per cached page). Each namespace has its own TTL and size
+# bound, LRU eviction and hit/miss counters. Values are frozen before
+# they are stored (dicts become FrozenDict, lists become tuples), so a
+# request can't mutate data another request will be served. The admin
+# area calls invalidate() after edits.
+#
+# The storage backend is pluggable:
+#   - MemoryBackend (default): per-process LRU.
+#   - RedisBackend (CACHE_URL=redis://...): shared by every worker and
+#     container. Keys carry a global and a per-namespace generation
+#     number, so invalidate() is a single INCR that every worker sees
+#     within CACHE_GENERATION_TTL seconds. Eviction is left to the
+#     server's maxmemory policy.
+#
+# Misses are single-flighted: concurrent callers asking for the same
+# namespace and key wait for one in-flight load instead of each running
+# it against Postgres. Coalesced callers are counted per namespace.
+
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+QUERY_CACHE_DISABLED = os.getenv("QUERY_CACHE_DISABLED", "") not in ("", "0")
+
+CACHE_URL = os.getenv("CACHE_URL", "")
+CACHE_PREFIX = os.getenv("CACHE_PREFIX", "dp")
+CACHE_GENERATION_TTL = float(os.getenv("CACHE_GENERATION_TTL", "1"))
+
+MISSING = object()
+
+
+class FrozenDict(dict):
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("cached query results are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value):
+    if isinstance(value, Mapping):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    return value
+
+
+# =========================
+# Serialization
+# =========================
+#
+# Values shared through Redis are stored as JSON, never pickle, so
+# whoever can write to the cache server can't run code in the workers.
+# JSON arrays come back as tuples and objects as FrozenDicts (the same
+# frozen shape set() stores); other types are written as a one-key
+# object {"$t": [type, payload]}. Dicts with non-string keys, or with a
+# "$t" key of their own, go through the "map" tag so they can't be
+# mistaken for one.
+
+_COMPRESS_OVER = 1024
+
+_TAG = "$t"
+
+_DECODERS = {
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "time": dt_time.fromisoformat,
+    "decimal": Decimal,
+    "bytes": base64.b64decode,
+}
+
+
+def _encode(value):
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, Mapping):
+        if _TAG not in value and all(type(k) is str for k in value):
+            return {k: _encode(v) for k, v in value.items()}
+        return {_TAG: ["map", [[_encode(k), _encode(v)] for k, v in value.items()]]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {_TAG: ["set", [_encode(v) for v in value]]}
+    if isinstance(value, datetime):
+        return {_TAG: ["datetime", value.isoformat()]}
+    if isinstance(value, date):
+        return {_TAG: ["date", value.isoformat()]}
+    if isinstance(value, dt_time):
+        return {_TAG: ["time", value.isoformat()]}
+    if isinstance(value, Decimal):
+        return {_TAG: ["decimal", str(value)]}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {_TAG: ["bytes", base64.b64encode(value).decode()]}
+    raise TypeError(f"can't cache a {type(value).__name__}")
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return tuple(_decode(v) for v in value)
+    if not isinstance(value, dict):
+        return value
+
+    if len(value) == 1 and _TAG in value:
+        kind, payload = value[_TAG]
+        if kind == "map":
+            return FrozenDict((_decode(k), _decode(v)) for k, v in payload)
+        if kind == "set":
+            return frozenset(_decode(v) for v in payload)
+        return _DECODERS[kind](payload)
+
+    return FrozenDict((k, _decode(v)) for k, v in value.items())
+
+
+def dumps(value) -> bytes:
+    data = orjson.dumps(_encode(value))
+    if len(data) > _COMPRESS_OVER:
+        return b"z" + zlib.compress(data, 6)
+    return b"j" + data
+
+
+def loads(data: bytes):
+    # Raises ValueError for anything that isn't a payload dumps() wrote.
+    try:
+        if data[:1] == b"z":
+            data = zlib.decompress(data[1:])
+        elif data[:1] == b"j":
+            data = data[1:]
+        else:
+            raise ValueError("unknown cache payload format")
+
+        return _decode(orjson.loads(data))
+    except (zlib.error, KeyError, TypeError) as exc:
+        raise ValueError("malformed cache payload") from exc
+
+
+# =========================
+# Backends
+# =========================
+
+class TTLCache:
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return MISSING
+
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return MISSING
+
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MemoryBackend:
+    shared = False
+
+    def __init__(self):
+        self._stores: dict[str, TTLCache] = {}
+        self._generation = 0
+
+    def _store(self, ns) -> TTLCache:
+        store = self._stores.get(ns.name)
+        if store is None:
+            store = self._stores.setdefault(
+                ns.name, TTLCache(ns.ttl, ns.maxsize)
+            )
+        return store
+
+    def get(self, ns, key):
+        return self._store(ns).get(key)
+
+    def set(self, ns, key, value):
+        self._store(ns).set(key, value)
+
+    def clear(self, ns=None) -> bool:
+        if ns is not None:
+            self._store(ns).clear()
+            return True
+
+        for store in self._stores.values():
+            store.clear()
+        self._generation += 1
+        return True
+
+    def generation(self) -> int:
+        return self._generation
+
+    def stats(self, ns) -> dict:
+        store = self._store(ns)
+        return {"size": len(store), "evictions": store.evictions}
+
+
+class RedisBackend:
+    shared = True
+
+    def __init__(self, url: str, prefix: str = CACHE_PREFIX):
+        # Only needed when a shared cache is configured.
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._error = redis.RedisError
+        self.prefix = prefix
+        self.errors = 0
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def _global_key(self) -> str:
+        return f"{self.prefix}:gen"
+
+    def _ns_key(self, name: str) -> str:
+        return f"{self.prefix}:gen:{name}"
+
+    def _fetch_generations(self, name: str):
+        now = time.monotonic()
+        cached = self._generations.get(name)
+
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        global_gen, ns_gen = self._redis.mget(
+            self._global_key(), self._ns_key(name)
+        )
+        generations = (int(global_gen or 0), int(ns_gen or 0))
+
+        with self._lock:
+            self._generations[name] = (now + CACHE_GENERATION_TTL, generations)
+
+        return generations
+
+    def _key(self, ns, key) -> str:
+        global_gen, ns_gen = self._fetch_generations(ns.name)
+        digest = hashlib.blake2b(
+            repr(key).encode(), digest_size=16
+        ).hexdigest()
+        return f"{self.prefix}:{global_gen}:{ns.name}:{ns_gen}:{digest}"
+
+    def get(self, ns, key):
+        try:
+            data = self._redis.get(self._key(ns, key))
+        except self._error:
+            self.errors += 1
+            return MISSING
+
+        if data is None:
+            return MISSING
+
+        try:
+            return loads(data)
+        except ValueError:
+            # Unreadable (or foreign) payloads are treated as misses.
+            self.errors += 1
+            return MISSING
+
+    def set(self, ns, key, value):
+        try:
+            self._redis.set(
+                self._key(ns, key),
+                dumps(value),
+                ex=max(1, int(ns.ttl)),
+            )
+        except (self._error, TypeError):
+            self.errors += 1
+
+    def clear(self, ns=None) -> bool:
+        # False when the server couldn't be reached: nothing was
+        # invalidated and callers have to say so.
+        name = self._global_key() if ns is None else self._ns_key(ns.name)
+
+        try:
+            self._redis.incr(name)
+        except self._error:
+            self.errors += 1
+            return False
+
+        with self._lock:
+            self._generations.clear()
+        return True
+
+    def generation(self) -> int:
+        try:
+            return self._fetch_generations("")[0]
+        except self._error:
+            self.errors += 1
+            return -1
+
+    def stats(self, ns) -> dict:
+        return {"errors": self.errors}
+
+
+backend = RedisBackend(CACHE_URL) if CACHE_URL else MemoryBackend()
+
+
+# =========================
+# Single-flight
+# =========================
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # Thread-level coalescing for the sync query loaders.
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def stats(self) -> dict:
+        return {"leaders": self.leaders, "coalesced": self.coalesced}
+
+
+class AsyncSingleFlight:
+    # Event-loop coalescing for async pipelines. The load runs as its own
+    # task, so a disconnecting leader doesn't cancel it for the others.
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._tasks = {}
+
+    async def do(self, key, fn):
+        task = self._tasks.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"leaders": self.leaders, "coalesced": self.coalesced}
+
+
+_flights: dict[str, SingleFlight | AsyncSingleFlight] = {}
+
+
+def async_single_flight(name: str) -> AsyncSingleFlight:
+    flight = _flights[name] = AsyncSingleFlight()
+    return flight
+
+
+# =========================
+# Namespaces
+# =========================
+
+class CacheNamespace:
+    def __init__(self, name: str, ttl: float, maxsize: int):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.flight = SingleFlight()
+
+    def get(self, key):
+        if QUERY_CACHE_DISABLED:
+            return MISSING
+
+        value = backend.get(self, key)
+
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return value
+
+    def set(self, key, value):
+        value = freeze(value)
+
+        if not QUERY_CACHE_DISABLED:
+            backend.set(self, key, value)
+
+        return value
+
+    def load(self, key, fn):
+        # Miss path: one caller per key runs fn and stores the result;
+        # concurrent callers for the same key share it.
+        return self.flight.do(key, lambda: self.set(key, fn()))
+
+    def clear(self) -> bool:
+        return backend.clear(self)
+
+    def stats(self) -> dict:
+        return {
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            **self.flight.stats(),
+            **backend.stats(self),
+        }
+
+
+_namespaces: dict[str, CacheNamespace] = {}
+
+
+def namespace(name: str, ttl: float | None = None, maxsize: int = 128):
+    if name in _namespaces:
+        raise ValueError(f"cache namespace {name!r} already exists")
+
+    ns = CacheNamespace(name, QUERY_CACHE_TTL if ttl is None else ttl, maxsize)
+    _namespaces[name] = ns
+    return ns
+
+
+def _make_key(args, kwargs):
+    if kwargs:
+        return args + tuple(sorted(kwargs.items()))
+    return args
+
+
+def cached(ttl: float | None = None, maxsize: int = 128):
+    def decorate(fn):
+        ns = namespace(fn.__name__, ttl, maxsize)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            value = ns.get(key)
+
+            if value is MISSING:
+                value = ns.load(key, lambda: fn(*args, **kwargs))
+
+            return value
+
+        wrapper.cache = ns
+        wrapper.uncached = fn
+        return wrapper
+
+    return decorate
+
+
+def invalidate(*names: str) -> bool:
+    # True when everything asked for was invalidated.
+    if not names:
+        return backend.clear()
+
+    cleared = True
+
+    for name in names:
+        ns = _namespaces.get(name)
+        if ns is None:
+            raise KeyError(f"no cache namespace named {name!r}")
+        cleared = ns.clear() and cleared
+
+    return cleared
+
+
+def generation() -> int:
+    # Bumped by every full invalidate(), in this process or (with a
+    # shared backend) any other; in-process indexes built from the same
+    # data compare it to decide when to rebuild.
+    return backend.generation()
+
+
+def stats() -> dict:
+    return {
+        "backend": type(backend).__name__,
+        "namespaces": {name: ns.stats() for name, ns in _namespaces.items()},
+        "single_flight": {
+            name: flight.stats() for name, flight in _flights.items()
+        },
+    }
@@ -1,6 +1,10 @@
 import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
+from starlette.concurrency import run_in_threadpool
 
 DATABASE_URL = (
     f"postgresql+psycopg://{os.environ['DB_USER']}:"
@@ -15,3 +19,94 @@ engine: Engine = create_engine(
     pool_pre_ping=True,
     future=True,
 )
+
+# Read-only GET/HEAD requests can run every query in one REPEATABLE READ
+# transaction, so all sections of a page see the same snapshot.
+DB_REQUEST_SNAPSHOT = os.getenv("DB_REQUEST_SNAPSHOT", "") not in ("", "0")
+
+
+# =========================
+# Request-scoped connections
+# =========================
+
+class RequestScope:
+    def __init__(self, snapshot: bool = False):
+        self.snapshot = snapshot
+        self.conn: Connection | None = None
+
+    def connection(self) -> Connection:
+        # Checked out lazily, so requests that never touch the
+        # database never touch the pool either.
+        if self.conn is None:
+            conn = engine.connect()
+            if self.snapshot:
+                conn.execution_options(
+                    isolation_level="REPEATABLE READ",
+                    postgresql_readonly=True,
+                )
+            self.conn = conn
+        return self.conn
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+_request_scope: ContextVar[RequestScope | None] = ContextVar(
+    "request_scope",
+    default=None,
+)
+
+
+@contextmanager
+def connect():
+    # Drop-in replacement for engine.connect(): inside a request scope
+    # every caller shares the request's connection (which the scope
+    # closes); outside one it checks out a fresh pooled connection.
+    scope = _request_scope.get()
+
+    if scope is None:
+        with engine.connect() as conn:
+            yield conn
+        return
+
+    conn = scope.connection()
+    try:
+        yield conn
+    except Exception:
+        # Don't let one failed statement poison the rest of the request.
+        conn.rollback()
+        raise
+
+
+@contextmanager
+def request_scope(snapshot: bool = False):
+    scope = RequestScope(snapshot)
+    token = _request_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _request_scope.reset(token)
+        scope.close()
+
+
+class RequestConnectionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        db_scope = RequestScope(
+            snapshot=DB_REQUEST_SNAPSHOT and scope["method"] in ("GET", "HEAD")
+        )
+        token = _request_scope.set(db_scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+            if db_scope.conn is not None:
+                await run_in_threadpool(db_scope.close)
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, Request, Query, Form, HTTPException, APIRouter, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
@@ -9,9 +10,12 @@ import os
 from starlette.middleware.sessions import SessionMiddleware
 import math
 
-from . import queries
+from . import autocomplete, cache, queries, suggest
+from .responses import ORJSONResponse, RawJSONResponse, json_payload
+from .db import RequestConnectionMiddleware
 from .sitemap import router as sitemap_router
 from .robots import router as robots_router
+from .video_page import load_video_detail, server_timing_header
 
 
 # =========================
@@ -28,18 +32,25 @@ app.add_middleware(
     SessionMiddleware,
     secret_key=os.getenv("SECRET_KEY","")
 )
+app.add_middleware(RequestConnectionMiddleware)
 
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 
 
+@app.on_event("startup")
+def start_autocomplete():
+    # Builds in the background; /api/autocomplete returns [] until ready.
+    autocomplete.index.start()
+
+
 # =========================
 # Routers
 # =========================
 
 pages = APIRouter(include_in_schema=False)
-api = APIRouter(prefix="/api")
+api = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
 
 
 # =========================
@@ -51,6 +62,19 @@ TURNSTILE_SECRET = os.getenv("TURNSTILE_SECRET", "")
 TURNSTILE_VERIFY_URL = "https://challenges.cloudflare.com/turnstile/v0/siteverify"
 TURNSTILE_SITE_KEY = os.getenv("TURNSTILE_SITE_KEY", "")
 
+# Rendered detail pages, keyed by entity id (shared across workers when
+# CACHE_URL is set).
+SONG_DETAIL_PAGES = cache.namespace("page:song_detail", maxsize=1024)
+ARTIST_DETAIL_PAGES = cache.namespace("page:artist_detail", maxsize=1024)
+VIDEO_DETAIL_PAGES = cache.namespace("page:video_detail", maxsize=1024)
+
+# Encoded /api payloads for endpoints without a Postgres-built document.
+VIDEO_PAYLOADS = cache.namespace("api:video_detail", maxsize=1024)
+SEARCH_PAYLOADS = cache.namespace("api:search", maxsize=512)
+
+# Concurrent misses for the same video page share one render.
+VIDEO_DETAIL_FLIGHT = cache.async_single_flight("page:video_detail")
+
 
 # =========================
 # Helpers
@@ -64,6 +88,42 @@ def render(request: Request, template: str, context: dict = {}, status_code=200)
     )
 
 
+VIDEOS_PER_PAGE = 50
+
+
+def load_videos_page(limit, after, before):
+    if after is not None and before is not None:
+        raise HTTPException(400, "Pass either after or before, not both")
+
+    try:
+        return queries.get_videos_page(limit, after=after, before=before)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
+
+def selected_letter_group(letters, anchor):
+    # The requested letter, or the first one with anything in it.
+    if anchor is not None:
+        group = queries.letter_group_for(anchor)
+        if group is None:
+            raise HTTPException(404)
+        return group
+
+    return next((item["letter"] for item in letters if item["available"]), None)
+
+
+def render_cached(request: Request, pages, key, template: str, load_context):
+    body = pages.get(key)
+
+    if body is cache.MISSING:
+        context = load_context()
+        if context is None:
+            raise HTTPException(404)
+        body = pages.set(key, render(request, template, context).body)
+
+    return HTMLResponse(body)
+
+
 def verify_turnstile(token: str, remote_ip: Optional[str] = None) -> bool:
     if not TURNSTILE_SECRET:
         return False
@@ -106,8 +166,13 @@ def home(request: Request):
 
 
 @pages.get("/search", response_class=HTMLResponse)
-def search_home(request: Request):
-    return render(request, "search/index.html")
+def search_home(request: Request, q: Optional[str] = None):
+    results = queries.search_all(q.strip()) if q and q.strip() else None
+
+    return render(request, "search/index.html", {
+        "query": q,
+        "results": results,
+    })
 
 
 @pages.get("/contact", response_class=HTMLResponse)
@@ -218,21 +283,89 @@ async def admin_login(
         }
     )
 
+@pages.get("/admin/cache")
+def admin_cache_stats(request: Request):
+
+    redirect = require_admin(request)
+    if redirect:
+        return redirect
+
+    return JSONResponse({
+        **cache.stats(),
+        "autocomplete": autocomplete.index.stats(),
+    })
+
+@pages.post("/admin/cache/invalidate")
+def admin_cache_invalidate(
+    request: Request,
+    name: str = Form("")
+):
+
+    redirect = require_admin(request)
+    if redirect:
+        return redirect
+
+    try:
+        if name:
+            invalidated = cache.invalidate(name)
+        else:
+            invalidated = cache.invalidate()
+    except KeyError:
+        raise HTTPException(404)
+
+    return JSONResponse(
+        {**cache.stats(), "invalidated": invalidated},
+        status_code=200 if invalidated else 503
+    )
+
+@pages.get("/admin/song-counts")
+def admin_song_counts(request: Request):
+
+    redirect = require_admin(request)
+    if redirect:
+        return redirect
+
+    return JSONResponse(queries.check_song_counts())
+
+@pages.post("/admin/song-counts/rebuild")
+def admin_song_counts_rebuild(request: Request):
+
+    redirect = require_admin(request)
+    if redirect:
+        return redirect
+
+    result = queries.check_song_counts(repair=True)
+    invalidated = True
+    if any(result["fixed"].values()):
+        invalidated = cache.invalidate()
+
+    # The repair is committed either way; a failed invalidation only
+    # means stale counts are served until their TTL runs out.
+    return JSONResponse({**result, "cache_invalidated": invalidated})
+
 # =========================
 # Songs
 # =========================
 
 
 @pages.get("/songs", response_class=HTMLResponse)
-def songs_page(request: Request, q: Optional[str] = None):
+def songs_page(
+    request: Request,
+    q: Optional[str] = None,
+    letter: Optional[str] = None
+):
     if q:
         results = queries.search_songs(q)
         songs = None
         letters = None
+        group = None
+        suggestions = suggest.index.suggest(q, "song") if not results else []
     else:
         results = None
-        songs = queries.get_all_songs()
+        suggestions = []
         letters = queries.get_song_letters()
+        group = selected_letter_group(letters, letter)
+        songs = queries.get_songs_by_letter(group) if group else []
 
     return render(
         request,
@@ -241,16 +374,34 @@ def songs_page(request: Request, q: Optional[str] = None):
             "results": results,
             "songs": songs,
             "letters": letters,
+            "letter_group": group,
+            "suggestions": suggestions,
             "query": q,
         },
     )
 
+@pages.get("/songs/letters/{anchor}", response_class=HTMLResponse)
+def songs_letter_section(request: Request, anchor: str):
+    group = queries.letter_group_for(anchor)
+    if group is None:
+        raise HTTPException(404)
+
+    return render(
+        request,
+        "songs/_letter_section.html",
+        {"songs": queries.get_songs_by_letter(group)},
+    )
+
 @pages.get("/songs/{song_id}", response_class=HTMLResponse)
 def song_detail(request: Request, song_id: int):
-    song = queries.get_song_detail(song_id)
-    if not song:
-        raise HTTPException(404)
-    return render(request, "songs/song_detail.html", {"song": song})
+    def load_context():
+        song = queries.get_song_detail(song_id)
+        return {"song": song} if song else None
+
+    return render_cached(
+        request, SONG_DETAIL_PAGES, song_id,
+        "songs/song_detail.html", load_context
+    )
 
 
 # =========================
@@ -258,15 +409,23 @@ def song_detail(request: Request, song_id: int):
 # =========================
 
 @pages.get("/artists", response_class=HTMLResponse)
-def artists_page(request: Request, q: Optional[str] = None):
+def artists_page(
+    request: Request,
+    q: Optional[str] = None,
+    letter: Optional[str] = None
+):
     if q:
         results = queries.search_artists(q)
         artists = None
         letters = None
+        group = None
+        suggestions = suggest.index.suggest(q, "artist") if not results else []
     else:
         results = None
-        artists = queries.get_all_artists()
+        suggestions = []
         letters = queries.get_artist_letters()
+        group = selected_letter_group(letters, letter)
+        artists = queries.get_artists_by_letter(group) if group else []
 
     return render(
         request,
@@ -275,41 +434,112 @@ def artists_page(request: Request, q: Optional[str] = None):
             "results": results,
             "artists": artists,
             "letters": letters,
+            "letter_group": group,
+            "suggestions": suggestions,
             "query": q,
         },
     )
 
+@pages.get("/artists/letters/{anchor}", response_class=HTMLResponse)
+def artists_letter_section(request: Request, anchor: str):
+    group = queries.letter_group_for(anchor)
+    if group is None:
+        raise HTTPException(404)
+
+    return render(
+        request,
+        "artists/_letter_section.html",
+        {"artists": queries.get_artists_by_letter(group)},
+    )
+
 @pages.get("/artists/{artist_id}", response_class=HTMLResponse)
 def artist_detail(request: Request, artist_id: int):
-    artist = queries.get_artist_detail(artist_id)
-    if not artist:
+    def load_context():
+        artist = queries.get_artist_detail(artist_id)
+        return {"artist": artist} if artist else None
+
+    return render_cached(
+        request, ARTIST_DETAIL_PAGES, artist_id,
+        "artists/artist_detail.html", load_context
+    )
+
+def load_head_to_head(a, b):
+    if a == b:
+        raise HTTPException(400, "Pick two different players")
+
+    comparison = queries.get_head_to_head(a, b)
+    if comparison is None:
         raise HTTPException(404)
-    return render(request, "artists/artist_detail.html", {"artist": artist})
+
+    return comparison
+
+
+@pages.get("/players/compare", response_class=HTMLResponse)
+def players_compare(
+    request: Request,
+    a: Optional[str] = None,
+    b: Optional[str] = None
+):
+    comparison = load_head_to_head(a, b) if a and b else None
+
+    return render(
+        request,
+        "players/compare.html",
+        {
+            "players": queries.list_players(),
+            "comparison": comparison,
+            "a": a,
+            "b": b,
+        }
+    )
+
+
+PLAYER_BATTLES_PER_PAGE = 20
+PLAYER_SORT_PATTERN = "^(" + "|".join(queries.PLAYER_SORTS) + ")$"
+
+
+def load_player_battles(player_id, limit, after):
+    try:
+        return queries.get_player_battles(player_id, limit, after)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
 
 @pages.get("/player/{slug}", response_class=HTMLResponse)
-def player_page(request: Request, slug: str):
+def player_page(request: Request, slug: str, after: Optional[str] = None):
     player = queries.get_player_by_slug(slug)
 
     if not player:
         raise HTTPException(404)
 
+    history = load_player_battles(player["id"], PLAYER_BATTLES_PER_PAGE, after)
+
     return render(
         request,
         "players/player_detail.html",
         {
             "player": player,
-            "recent_battles": []
+            "recent_battles": history["battles"],
+            "next_cursor": history["next"],
         }
     )
+
+
 @pages.get("/players", response_class=HTMLResponse)
-def players_index(request: Request):
-    players = queries.list_players()
+def players_index(
+    request: Request,
+    sort: str = Query("name", pattern=PLAYER_SORT_PATTERN),
+    order: str = Query("asc", pattern="^(asc|desc)$")
+):
+    players = queries.list_players(sort, order == "desc")
 
     return render(
         request,
         "players/index.html",
         {
-            "players": players
+            "players": players,
+            "sort": sort,
+            "order": order,
         }
     )
 
@@ -321,24 +551,23 @@ def players_index(request: Request):
 def videos_page(
     request: Request,
     q: Optional[str] = None,
-    page: int = 1
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    page: int = Query(1, ge=1)
 ):
-    PER_PAGE = 50
-
     if q:
         results = queries.search_videos(q)
-        videos = None
+        listing = None
         total_pages = None
     else:
         results = None
 
-        total = queries.get_video_count()
-        total_pages = math.ceil(total / PER_PAGE)
+        # `page` only labels the position; the cursors do the paging.
+        if after is None and before is None:
+            page = 1
 
-        videos = queries.get_videos(
-            limit=PER_PAGE,
-            offset=(page - 1) * PER_PAGE
-        )
+        total_pages = math.ceil(queries.get_video_count() / VIDEOS_PER_PAGE)
+        listing = load_videos_page(VIDEOS_PER_PAGE, after, before)
 
     return render(
         request,
@@ -346,7 +575,9 @@ def videos_page(
         {
             "query": q,
             "results": results,
-            "videos": videos,
+            "videos": listing["videos"] if listing else None,
+            "next_cursor": listing["next"] if listing else None,
+            "prev_cursor": listing["prev"] if listing else None,
             "page": page,
             "total_pages": total_pages,
         },
@@ -386,18 +617,33 @@ def category_detail(request: Request, slug: str, q: Optional[str] = None):
 
 
 @pages.get("/videos/{video_id}", response_class=HTMLResponse)
-def video_detail(request: Request, video_id: int):
-    video = queries.get_video_detail_page(video_id)
-    if not video:
-        raise HTTPException(404)
-
-    return render(request, "videos/video_detail.html", {
-        "video": video,
-        "battle": queries.get_battle_view(video_id),
-        "overtime": queries.get_overtime_view(video_id),
-        "bucket_list": queries.get_bucket_list_view(video_id),
-        "stereotypes": queries.get_stereotypes_view(video_id),
-    })
+async def video_detail(request: Request, video_id: int):
+    # Cache reads/writes (network round trips with a shared backend) and
+    # the template render are blocking, so they run on the threadpool
+    # instead of stalling the event loop. Every request goes through the
+    # page cache and single-flight; loader mode is set by
+    # VIDEO_DETAIL_PARALLEL, not by the client.
+    body = await run_in_threadpool(VIDEO_DETAIL_PAGES.get, video_id)
+    if body is not cache.MISSING:
+        return HTMLResponse(body)
+
+    def render_and_store(sections):
+        body = render(request, "videos/video_detail.html", sections).body
+        return VIDEO_DETAIL_PAGES.set(video_id, body)
+
+    async def render_page():
+        sections, timings = await load_video_detail(video_id)
+        if not sections["video"]:
+            raise HTTPException(404)
+
+        return await run_in_threadpool(render_and_store, sections), timings
+
+    body, timings = await VIDEO_DETAIL_FLIGHT.do(video_id, render_page)
+
+    return HTMLResponse(
+        body,
+        headers={"Server-Timing": server_timing_header(timings)}
+    )
 
 
 # =========================
@@ -421,33 +667,94 @@ def category_detail(request: Request, slug: str, q: Optional[str] = None):
 # API
 # =========================
 
+@api.get("/players")
+def api_players(
+    sort: str = Query("name", pattern=PLAYER_SORT_PATTERN),
+    order: str = Query("asc", pattern="^(asc|desc)$")
+):
+    return queries.list_players(sort, order == "desc")
+
+
+@api.get("/players/compare")
+def api_players_compare(a: str, b: str):
+    return load_head_to_head(a, b)
+
+
+@api.get("/players/{slug}/battles")
+def api_player_battles(
+    slug: str,
+    after: Optional[str] = None,
+    limit: int = Query(PLAYER_BATTLES_PER_PAGE, ge=1, le=100)
+):
+    player = queries.get_player_by_slug(slug)
+    if not player:
+        raise HTTPException(404)
+
+    return load_player_battles(player["id"], limit, after)
+
+
 @api.get("/search")
-def api_search(q: str):
-    return queries.search_songs(q)
+def api_search(q: str, per_type: int = Query(10, ge=1, le=50)):
+    payload = json_payload(
+        SEARCH_PAYLOADS,
+        (q, per_type),
+        lambda: queries.search_all(q, per_type=per_type)
+    )
+    return RawJSONResponse(payload)
+
+
+@api.get("/videos")
+def api_videos(
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = Query(VIDEOS_PER_PAGE, ge=1, le=200)
+):
+    listing = load_videos_page(limit, after, before)
+    return {**listing, "total": queries.get_video_count()}
+
+
+@api.get("/search/episodes")
+def api_search_episodes(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50)
+):
+    return {"query": q, "videos": queries.search_episodes(q, limit)}
+
+
+@api.get("/autocomplete")
+def api_autocomplete(
+    q: str = Query(..., max_length=100),
+    limit: int = Query(8, ge=1, le=autocomplete.MAX_LIMIT)
+):
+    return autocomplete.index.search(q, limit)
 
 
 @api.get("/songs/{song_id}")
 def api_song(song_id: int):
-    song = queries.get_song_detail(song_id)
-    if not song:
+    payload = queries.get_song_detail_json(song_id)
+    if payload is None:
         raise HTTPException(404)
-    return song
+    return RawJSONResponse(payload)
 
 
 @api.get("/artists/{artist_id}")
 def api_artist(artist_id: int):
-    artist = queries.get_artist_detail(artist_id)
-    if not artist:
+    payload = queries.get_artist_detail_json(artist_id)
+    if payload is None:
         raise HTTPException(404)
-    return artist
+    return RawJSONResponse(payload)
 
 
 @api.get("/videos/{video_id}")
 def api_video(video_id: int):
-    video = queries.get_video_detail_page(video_id)
-    if not video:
+    payload = json_payload(
+        VIDEO_PAYLOADS,
+        video_id,
+        lambda: queries.get_video_detail_page(video_id)
+    )
+    if payload is None:
         raise HTTPException(404)
-    return video
+    return RawJSONResponse(payload)
 
 
 # =========================
@@ -1,9 +1,30 @@
+import base64
+import html
 from collections import defaultdict, Counter
+from datetime import date, datetime
 from sqlalchemy import text
-from .db import engine
+from .bracket import BRACKET_ROUND_TYPES, build_bracket
+from .cache import cached
+from .db import connect
 
+MATCH_ROUND_TYPES = ("round_robin", "elimination", "tournament")
+
+
+def _group_rows(rows, key):
+    # Bucket mapping rows by `key`; the key column only exists for
+    # grouping, so it is dropped from the resulting dicts.
+    grouped = defaultdict(list)
+
+    for row in rows:
+        item = dict(row)
+        grouped[item.pop(key)].append(item)
+
+    return grouped
+
+
+@cached(maxsize=512)
 def get_battle_view(video_id: int):
-    with engine.connect() as conn:
+    with connect() as conn:
 
         # =========================
         # 1️⃣ Load battle + video
@@ -30,6 +51,11 @@ def get_battle_view(video_id: int):
         if not battle_row:
             return None
 
+        params = {
+            "battle_id": battle_row["battle_id"],
+            "match_round_types": list(MATCH_ROUND_TYPES),
+        }
+
         # =========================
         # 2️⃣ Teams / Players
         # =========================
@@ -44,41 +70,45 @@ def get_battle_view(video_id: int):
                 WHERE battle_id = :battle_id
                 ORDER BY id;
             """),
-            {"battle_id": battle_row["battle_id"]}
+            params
         ).mappings().all()
 
-        teams = []
-
         # -------------------------
         # Team battle
         # -------------------------
         if team_rows:
 
-            for team in team_rows:
-
-                members = conn.execute(
-                    text("""
-                        SELECT
-                            p.id AS player_id,
-                            p.name,
-                            bp.is_guest,
-                            bp.notes
-                        FROM battle_team_members btm
-                        JOIN battle_players bp
-                            ON bp.id = btm.battle_player_id
-                        JOIN players p
-                            ON p.id = bp.player_id
-                        WHERE btm.team_id = :team_id
-                        ORDER BY p.name
-                    """),
-                    {"team_id": team["id"]}
-                ).mappings().all()
-
-                teams.append({
+            member_rows = conn.execute(
+                text("""
+                    SELECT
+                        btm.team_id,
+                        p.id AS player_id,
+                        p.name,
+                        bp.is_guest,
+                        bp.notes
+                    FROM battle_team_members btm
+                    JOIN battle_teams bt
+                        ON bt.id = btm.team_id
+                    JOIN battle_players bp
+                        ON bp.id = btm.battle_player_id
+                    JOIN players p
+                        ON p.id = bp.player_id
+                    WHERE bt.battle_id = :battle_id
+                    ORDER BY btm.team_id, p.name
+                """),
+                params
+            ).mappings().all()
+
+            members_by_team = _group_rows(member_rows, "team_id")
+
+            teams = [
+                {
                     "name": team["name"],
                     "accent_color": team["accent_color"],
-                    "players": [dict(x) for x in members]
-                })
+                    "players": members_by_team.get(team["id"], [])
+                }
+                for team in team_rows
+            ]
 
         # -------------------------
         # Individual battle
@@ -98,7 +128,7 @@ def get_battle_view(video_id: int):
                     WHERE bp.battle_id = :battle_id
                     ORDER BY p.name
                 """),
-                {"battle_id": battle_row["battle_id"]}
+                params
             ).mappings().all()
 
             teams = [{
@@ -122,149 +152,187 @@ def get_battle_view(video_id: int):
                 WHERE br.battle_id = :battle_id
                 ORDER BY br.round_order
             """),
-            {"battle_id": battle_row["battle_id"]}
+            params
         ).mappings().all()
 
-        timeline = []
+        results_by_round = {}
+        matches_by_round = {}
+        participants_by_match = {}
 
-        for r in rounds:
+        if rounds:
 
             # =====================
-            # Overall round results
+            # Overall round results (every round at once)
             # =====================
 
-            results = conn.execute(
+            result_rows = conn.execute(
                 text("""
                     SELECT
+                        brp.battle_round_id,
                         COALESCE(p.name, bt.name) AS name,
                         brp.status,
                         brp.placement,
                         brp.score,
                         brp.notes
                     FROM battle_round_participants brp
+                    JOIN battle_rounds br
+                        ON br.id = brp.battle_round_id
                     LEFT JOIN battle_players bp
                         ON brp.battle_player_id = bp.id
                     LEFT JOIN players p
                         ON p.id = bp.player_id
                     LEFT JOIN battle_teams bt
                         ON bt.id = brp.battle_team_id
-                    WHERE brp.battle_round_id = :round_id
+                    WHERE br.battle_id = :battle_id
                     ORDER BY
+                        brp.battle_round_id,
                         brp.placement NULLS LAST,
                         COALESCE(p.name, bt.name)
                 """),
-                {"round_id": r["id"]}
+                params
             ).mappings().all()
 
-            # =====================
-            # Matches
-            # =====================
+            results_by_round = _group_rows(result_rows, "battle_round_id")
 
-            matches = []
-
-            if r["round_type"] in ("round_robin", "elimination", "tournament"):
-
-                match_rows = conn.execute(
-                    text("""
-                        SELECT
-                            id,
-                            match_order,
-                            title
-                        FROM battle_round_matches
-                        WHERE battle_round_id = :round_id
-                        ORDER BY match_order
-                    """),
-                    {"round_id": r["id"]}
-                ).mappings().all()
-
-                for match in match_rows:
-
-                    participants = conn.execute(
-                        text("""
-                            SELECT
-                                COALESCE(p.name, bt.name) AS name,
-                                brmp.placement,
-                                brmp.score,
-                                brmp.status,
-                                brmp.notes
-                            FROM battle_round_match_participants brmp
-
-                            LEFT JOIN battle_players bp
-                                ON bp.id = brmp.battle_player_id
-
-                            LEFT JOIN players p
-                                ON p.id = bp.player_id
-
-                            LEFT JOIN battle_teams bt
-                                ON bt.id = brmp.battle_team_id
-
-                            WHERE brmp.battle_round_match_id = :match_id
-
-                            ORDER BY
-                                brmp.placement NULLS LAST,
-                                COALESCE(p.name, bt.name)
-                        """),
-                        {"match_id": match["id"]}
-                    ).mappings().all()
-
-                    matches.append({
-                        "id": match["id"],
-                        "match_order": match["match_order"],
-                        "title": match["title"],
-                        "participants": [
-                            dict(x) for x in participants
-                        ]
-                    })
+        if any(r["round_type"] in MATCH_ROUND_TYPES for r in rounds):
 
             # =====================
-            # Add round to timeline
+            # Matches (every match round at once)
             # =====================
 
-            timeline.append({
-                "id": r["id"],
-                "round_order": r["round_order"],
-                "name": r["name"],
-                "round_type": r["round_type"],
-                "score_label": r["score_label"],
-                "results": [dict(x) for x in results],
-                "matches": matches
-            })
-
-        # =========================
-        # 4️⃣ Final standings
-        # =========================
-
-        final_standings = []
-
-        if rounds:
+            match_rows = conn.execute(
+                text("""
+                    SELECT
+                        m.battle_round_id,
+                        m.id,
+                        m.match_order,
+                        m.title
+                    FROM battle_round_matches m
+                    JOIN battle_rounds br
+                        ON br.id = m.battle_round_id
+                    WHERE br.battle_id = :battle_id
+                      AND br.round_type = ANY(:match_round_types)
+                    ORDER BY m.battle_round_id, m.match_order
+                """),
+                params
+            ).mappings().all()
 
-            final_round_id = rounds[-1]["id"]
+            matches_by_round = _group_rows(match_rows, "battle_round_id")
 
-            final_standings = conn.execute(
+            participant_rows = conn.execute(
                 text("""
                     SELECT
+                        brmp.battle_round_match_id,
+                        CASE
+                            WHEN brmp.battle_player_id IS NOT NULL
+                                THEN 'p' || brmp.battle_player_id
+                            WHEN brmp.battle_team_id IS NOT NULL
+                                THEN 't' || brmp.battle_team_id
+                        END AS participant_key,
                         COALESCE(p.name, bt.name) AS name,
-                        brp.status,
-                        brp.placement,
-                        brp.score,
-                        brp.notes
-                    FROM battle_round_participants brp
+                        brmp.placement,
+                        brmp.score,
+                        brmp.status,
+                        brmp.notes
+                    FROM battle_round_match_participants brmp
+
+                    JOIN battle_round_matches m
+                        ON m.id = brmp.battle_round_match_id
+
+                    JOIN battle_rounds br
+                        ON br.id = m.battle_round_id
+
                     LEFT JOIN battle_players bp
-                        ON brp.battle_player_id = bp.id
+                        ON bp.id = brmp.battle_player_id
+
                     LEFT JOIN players p
                         ON p.id = bp.player_id
+
                     LEFT JOIN battle_teams bt
-                        ON bt.id = brp.battle_team_id
-                    WHERE brp.battle_round_id = :round_id
+                        ON bt.id = brmp.battle_team_id
+
+                    WHERE br.battle_id = :battle_id
+                      AND br.round_type = ANY(:match_round_types)
+
                     ORDER BY
-                        brp.placement NULLS LAST,
+                        brmp.battle_round_match_id,
+                        brmp.placement NULLS LAST,
                         COALESCE(p.name, bt.name)
                 """),
-                {"round_id": final_round_id}
+                params
             ).mappings().all()
 
+            participants_by_match = _group_rows(
+                participant_rows,
+                "battle_round_match_id"
+            )
+
+    # =========================
+    # 4️⃣ Assemble timeline
+    # =========================
+
+    timeline = []
+
+    for r in rounds:
+
+        matches = []
+
+        if r["round_type"] in MATCH_ROUND_TYPES:
+            matches = [
+                {
+                    "id": match["id"],
+                    "match_order": match["match_order"],
+                    "title": match["title"],
+                    "participants": participants_by_match.get(match["id"], [])
+                }
+                for match in matches_by_round.get(r["id"], [])
+            ]
+
+        timeline.append({
+            "id": r["id"],
+            "round_order": r["round_order"],
+            "name": r["name"],
+            "round_type": r["round_type"],
+            "score_label": r["score_label"],
+            "results": results_by_round.get(r["id"], []),
+            "matches": matches
+        })
+
+    # =========================
+    # 5️⃣ Elimination bracket
+    # =========================
+
+    # Built from the matches loaded above, so the layout always agrees
+    # with the timeline. Bracket rounds render as one tree on the first
+    # of them; the rest are marked so the template skips them.
+    bracket = build_bracket(_bracket_rows(
+        r for r in timeline if r["round_type"] in BRACKET_ROUND_TYPES
+    ))
+
+    if bracket:
+        bracket_rounds = [
+            r for r in timeline if r["id"] in bracket["round_ids"]
+        ]
+
+        for r in bracket_rounds:
+            r["in_bracket"] = True
+            r["bracket"] = None
+
+        bracket_rounds[0]["bracket"] = bracket
+
     # =========================
-    # 5️⃣ Shape data for template
+    # 6️⃣ Final standings
+    # =========================
+
+    # The last round's results double as the final standings; copy them
+    # so the template can't alias the two lists.
+    final_standings = []
+
+    if timeline:
+        final_standings = [dict(x) for x in timeline[-1]["results"]]
+
+    # =========================
+    # 7️⃣ Shape data for template
     # =========================
 
     return {
@@ -277,27 +345,860 @@ def get_battle_view(video_id: int):
         "notes": battle_row["notes"],
         "teams": teams,
         "timeline": timeline,
-        "final_standings": [dict(x) for x in final_standings]
+        "final_standings": final_standings
     }
 
-def get_overtime_view(video_id: int):
-    with engine.connect() as conn:
+def _bracket_rows(rounds):
+    # One row per match participant (or per empty match), in play order,
+    # as bracket.build_bracket() expects them.
+    rows = []
 
-        # 1️⃣ Find episode
-        episode = conn.execute(
+    for r in rounds:
+        for match in r["matches"]:
+            base = {
+                "round_id": r["id"],
+                "round_order": r["round_order"],
+                "round_name": r["name"],
+                "match_id": match["id"],
+                "match_order": match["match_order"],
+                "title": match["title"],
+            }
+
+            if not match["participants"]:
+                rows.append({**base, "participant_key": None})
+
+            for participant in match["participants"]:
+                rows.append({**base, **participant})
+
+    return rows
+
+# =========================
+# Overtime segment loaders
+# =========================
+#
+# Each loader receives every segment of its type in an episode and loads
+# their rows with `= ANY(:ids)` queries, so an episode costs a handful of
+# queries per segment type instead of several per segment and item.
+# Loaders return {segment_id: formatted_segment}; a segment missing from
+# the result is left off the page.
+
+OVERTIME_SEGMENT_LOADERS = {}
+
+
+def overtime_segment_loader(*canonical_names):
+    def register(loader):
+        for name in canonical_names:
+            OVERTIME_SEGMENT_LOADERS[name] = loader
+        return loader
+    return register
+
+
+def _first_rows(rows, key):
+    # Like _group_rows, but keeps only the first row per key (the
+    # per-segment "event" tables hold a single row per segment).
+    first = {}
+
+    for row in rows:
+        item = dict(row)
+        first.setdefault(item.pop(key), item)
+
+    return first
+
+
+def _cool_not_cool_overall(votes):
+    vote_values = [v["vote"] for v in votes]
+    cool_count = vote_values.count("cool")
+    not_cool_count = vote_values.count("not_cool")
+    total_votes = len(vote_values)
+
+    if total_votes > 0 and cool_count == total_votes:
+        return "super_cool"
+    elif total_votes > 0 and not_cool_count == total_votes:
+        return "super_not_cool"
+    elif cool_count > not_cool_count:
+        return "cool"
+    elif not_cool_count > cool_count:
+        return "not_cool"
+    return "tie"
+
+
+# =========================
+# 🎬 COOL NOT COOL
+# =========================
+@overtime_segment_loader("Cool Not Cool", "Not Cool Cool")
+def _load_cool_not_cool(conn, segments):
+    ids = [s["id"] for s in segments]
+
+    items = _group_rows(conn.execute(
+        text("""
+            SELECT
+                i.segment_id,
+                i.id,
+                i.item_name,
+                p.name AS presenter_name
+            FROM overtime_segment_items i
+            LEFT JOIN players p
+              ON p.id = i.presenter_id
+            WHERE i.segment_id = ANY(:ids)
+            ORDER BY i.segment_id, i.id
+        """),
+        {"ids": ids}
+    ).mappings().all(), "segment_id")
+
+    votes = _group_rows(conn.execute(
+        text("""
+            SELECT
+                v.item_id,
+                pl.name AS voter_name,
+                v.vote
+            FROM overtime_segment_item_votes v
+            JOIN overtime_segment_items i
+              ON i.id = v.item_id
+            JOIN players pl
+              ON pl.id = v.voter_id
+            WHERE i.segment_id = ANY(:ids)
+            ORDER BY v.item_id, pl.name
+        """),
+        {"ids": ids}
+    ).mappings().all(), "item_id")
+
+    formatted = {}
+
+    for segment in segments:
+        formatted_items = []
+
+        for item in items.get(segment["id"], []):
+            item_votes = votes.get(item["id"], [])
+
+            formatted_items.append({
+                "item_name": item["item_name"],
+                "presenter_name": item["presenter_name"],
+                "votes": item_votes,
+                "overall": _cool_not_cool_overall(item_votes)
+            })
+
+        formatted[segment["id"]] = {
+            "segment_type": segment["canonical_name"] or segment["name"],
+            "display_name": segment["name"],
+            "items": formatted_items
+        }
+
+    return formatted
+
+
+# =========================
+# 🎡 WHEEL SEGMENT
+# =========================
+@overtime_segment_loader("Wheel Unfortunate", "Wheel Fortunate")
+def _load_wheel(conn, segments):
+    events = _group_rows(conn.execute(
+        text("""
+            SELECT
+                w.segment_id,
+                w.id,
+                sp.name AS selected_player,
+                hp.name AS host_name,
+                w.mechanism,
+                w.outcome_type,
+                w.outcome_text
+            FROM overtime_wheel_events w
+            LEFT JOIN players sp
+            ON sp.id = w.selected_player_id
+            LEFT JOIN players hp
+            ON hp.id = w.host_id
+            WHERE w.segment_id = ANY(:ids)
+            ORDER BY w.segment_id, w.id
+        """),
+        {"ids": [s["id"] for s in segments]}
+    ).mappings().all(), "segment_id")
+
+    return {
+        s["id"]: {
+            "segment_type": s["name"],
+            "events": events.get(s["id"], [])
+        }
+        for s in segments
+    }
+
+
+# =========================
+# 🎯 BETCHA
+# =========================
+@overtime_segment_loader("Betcha")
+def _load_betcha(conn, segments):
+    ids = [s["id"] for s in segments]
+
+    events = _first_rows(conn.execute(
+        text("""
+            SELECT
+                b.segment_id,
+                p.name AS presenter_name,
+                b.bet_description,
+                b.outcome
+            FROM overtime_betcha_events b
+            JOIN players p
+            ON p.id = b.presenter_id
+            WHERE b.segment_id = ANY(:ids)
+        """),
+        {"ids": ids}
+    ).mappings().all(), "segment_id")
+
+    votes = _group_rows(conn.execute(
+        text("""
+            SELECT
+                v.segment_id,
+                pl.name AS voter_name,
+                v.vote
+            FROM overtime_betcha_votes v
+            JOIN players pl
+              ON pl.id = v.voter_id
+            WHERE v.segment_id = ANY(:ids)
+            ORDER BY v.segment_id, pl.name
+        """),
+        {"ids": ids}
+    ).mappings().all(), "segment_id")
+
+    return {
+        s["id"]: {
+            "segment_type": s["name"],
+            "event": events.get(s["id"]),
+            "votes": votes.get(s["id"], [])
+        }
+        for s in segments
+    }
+
+
+# =========================
+# 🎨 GET CRAFTY
+# =========================
+@overtime_segment_loader("Get Crafty")
+def _load_get_crafty(conn, segments):
+    ids = [s["id"] for s in segments]
+
+    events = _first_rows(conn.execute(
+        text("""
+            SELECT
+                segment_id,
+                challenge_name,
+                description,
+                winner_id,
+                notes
+            FROM overtime_get_crafty_events
+            WHERE segment_id = ANY(:ids)
+        """),
+        {"ids": ids}
+    ).mappings().all(), "segment_id")
+
+    participants = _group_rows(conn.execute(
+        text("""
+            SELECT
+                ge.segment_id,
+                p.name AS player_name,
+                gp.placement,
+                gp.notes
+            FROM overtime_get_crafty_participants gp
+            JOIN players p
+                ON p.id = gp.player_id
+            JOIN overtime_get_crafty_events ge
+                ON ge.id = gp.event_id
+            WHERE ge.segment_id = ANY(:ids)
+            ORDER BY
+                ge.segment_id,
+                gp.placement NULLS LAST,
+                p.name
+        """),
+        {"ids": ids}
+    ).mappings().all(), "segment_id")
+
+    return {
+        s["id"]: {
+            "segment_type": s["name"],
+            "event": events.get(s["id"]),
+            "participants": participants.get(s["id"], [])
+        }
+        for s in segments
+    }
+
+
+# =========================
+# 🎮 GAME TIME
+# =========================
+@overtime_segment_loader("Game Time")
+def _load_game_time(conn, segments):
+    events = _first_rows(conn.execute(
+        text("""
+            SELECT
+                e.segment_id,
+                e.id,
+                e.game_description,
+                e.score_label,
+                e.win_condition,
+                p.name AS winner_name
+            FROM overtime_game_time_events e
+            LEFT JOIN players p
+            ON p.id = e.winner_player_id
+            WHERE e.segment_id = ANY(:ids)
+        """),
+        {"ids": [s["id"] for s in segments]}
+    ).mappings().all(), "segment_id")
+
+    results = {}
+
+    if events:
+        results = _group_rows(conn.execute(
             text("""
-                SELECT id
-                FROM overtime_episodes
-                WHERE video_id = :video_id
-                LIMIT 1
+                SELECT
+                    r.event_id,
+                    p.name,
+                    r.score_display,
+                    r.is_winner
+                FROM overtime_game_time_results r
+                JOIN players p ON p.id = r.player_id
+                WHERE r.event_id = ANY(:event_ids)
+                ORDER BY r.event_id, r.score_numeric DESC NULLS LAST
             """),
-            {"video_id": video_id}
-        ).mappings().first()
+            {"event_ids": [e["id"] for e in events.values()]}
+        ).mappings().all(), "event_id")
 
-        if not episode:
-            return None
+    formatted = {}
+
+    for s in segments:
+        event = events.get(s["id"])
 
-        # 2️⃣ Get segments for this episode
+        formatted[s["id"]] = {
+            "segment_type": s["name"],
+            "event": event,
+            "results": results.get(event["id"], []) if event else []
+        }
+
+    return formatted
+
+
+# =========================
+# 📏 ABSURD RECURDS
+# =========================
+@overtime_segment_loader("Absurd Recurds")
+def _load_absurd_recurds(conn, segments):
+    records = _first_rows(conn.execute(
+        text("""
+            SELECT
+                ar.segment_id,
+                ar.record_description,
+                p.name AS player_name,
+                ar.outcome,
+                ar.notes
+            FROM overtime_absurd_recurds ar
+            LEFT JOIN players p
+            ON p.id = ar.player_id
+            WHERE ar.segment_id = ANY(:ids)
+        """),
+        {"ids": [s["id"] for s in segments]}
+    ).mappings().all(), "segment_id")
+
+    return {
+        s["id"]: {
+            "segment_type": s["name"],
+            "record": records.get(s["id"])
+        }
+        for s in segments
+    }
+
+
+# =========================
+# ⚖️ JUDGE DUDY
+# =========================
+@overtime_segment_loader("Judge Dudy")
+def _load_judge_dudy(conn, segments):
+    cases = _first_rows(conn.execute(
+        text("""
+            SELECT
+                c.segment_id,
+                c.id,
+                c.case_title,
+                c.case_description,
+                c.verdict
+            FROM overtime_judge_dudy_cases c
+            WHERE c.segment_id = ANY(:ids)
+        """),
+        {"ids": [s["id"] for s in segments]}
+    ).mappings().all(), "segment_id")
+
+    participants = {}
+
+    if cases:
+        participants = _group_rows(conn.execute(
+            text("""
+                SELECT
+                    j.case_id,
+                    p.name,
+                    j.role
+                FROM overtime_judge_dudy_participants j
+                JOIN players p
+                  ON p.id = j.player_id
+                WHERE j.case_id = ANY(:case_ids)
+            """),
+            {"case_ids": [c["id"] for c in cases.values()]}
+        ).mappings().all(), "case_id")
+
+    formatted = {}
+
+    for s in segments:
+        case = cases.get(s["id"])
+
+        # Convert participants into role dictionary
+        role_map = defaultdict(list)
+
+        for p in participants.get(case["id"], []) if case else []:
+            role_map[p["role"]].append(p["name"])
+
+        formatted[s["id"]] = {
+            "segment_type": s["name"],
+            "case": {
+                "title": case["case_title"],
+                "description": case["case_description"],
+                "verdict": case["verdict"],
+                "participants": dict(role_map)
+            } if case else None
+        }
+
+    return formatted
+
+
+# =========================
+# 🔟 TOP LISTS
+# =========================
+@overtime_segment_loader("Top 10", "Not Top 10", "Top 15")
+def _load_top_list(conn, segments):
+    events = _first_rows(conn.execute(
+        text("""
+            SELECT
+                tle.segment_id,
+                tle.id,
+                tle.title,
+                p.name AS presenter_name
+            FROM overtime_top_list_events tle
+            LEFT JOIN players p
+                ON p.id = tle.presenter_id
+            WHERE tle.segment_id = ANY(:ids)
+        """),
+        {"ids": [s["id"] for s in segments]}
+    ).mappings().all(), "segment_id")
+
+    entries = {}
+
+    if events:
+        entries = _group_rows(conn.execute(
+            text("""
+                SELECT
+                    i.event_id,
+                    i.id,
+                    i.rank,
+                    i.rank_display,
+                    i.item_text,
+                    i.item_type,
+                    i.reveal_order,
+                    m.media_type,
+                    m.media_url,
+                    m.alt_text
+                FROM overtime_top_list_items i
+                LEFT JOIN overtime_top_list_item_media m
+                    ON m.item_id = i.id
+                WHERE i.event_id = ANY(:event_ids)
+                ORDER BY
+                    i.event_id,
+                    CASE
+                        WHEN i.item_type = 'ranked' THEN 0
+                        ELSE 1
+                    END,
+                    i.rank DESC,
+                    i.reveal_order ASC NULLS LAST;
+            """),
+            {"event_ids": [e["id"] for e in events.values()]}
+        ).mappings().all(), "event_id")
+
+    formatted = {}
+
+    for s in segments:
+        event = events.get(s["id"])
+        event_entries = entries.get(event["id"], []) if event else []
+
+        formatted[s["id"]] = {
+            "segment_type": s["name"],
+            "event": event,
+            "entries": [
+                e for e in event_entries
+                if e["item_type"] == "ranked"
+            ],
+            "honorable_mentions": [
+                e for e in event_entries
+                if e["item_type"] == "honorable_mention"
+            ]
+        }
+
+    return formatted
+
+
+# =========================
+# 👅 TASTE TEST
+# =========================
+@overtime_segment_loader("Taste Test")
+def _load_taste_test(conn, segments):
+    events = _first_rows(conn.execute(
+        text("""
+            SELECT
+                e.segment_id,
+                e.id,
+                e.food_item,
+                p.name AS participant_name
+            FROM overtime_taste_test_events e
+            LEFT JOIN players p
+                ON p.id = e.participant_id
+            WHERE e.segment_id = ANY(:ids)
+        """),
+        {"ids": [s["id"] for s in segments]}
+    ).mappings().all(), "segment_id")
+
+    samples = {}
+    rankings = {}
+
+    if events:
+        event_ids = [e["id"] for e in events.values()]
+
+        samples = _group_rows(conn.execute(
+            text("""
+                SELECT
+                    event_id,
+                    sample_label,
+                    actual_item,
+                    guessed_item,
+                    LOWER(actual_item) = LOWER(guessed_item) AS guess_correct
+                FROM overtime_taste_test_samples
+                WHERE event_id = ANY(:event_ids)
+                ORDER BY event_id, sample_label
+            """),
+            {"event_ids": event_ids}
+        ).mappings().all(), "event_id")
+
+        rankings = _group_rows(conn.execute(
+            text("""
+                SELECT
+                    s.event_id,
+                    r.placement,
+                    s.sample_label,
+                    s.actual_item,
+                    s.guessed_item,
+                    LOWER(s.actual_item) = LOWER(s.guessed_item) AS guess_correct
+                FROM overtime_taste_test_rankings r
+                JOIN overtime_taste_test_samples s
+                    ON s.id = r.sample_id
+                WHERE s.event_id = ANY(:event_ids)
+                ORDER BY s.event_id, r.placement
+            """),
+            {"event_ids": event_ids}
+        ).mappings().all(), "event_id")
+
+    formatted = {}
+
+    for s in segments:
+        event = events.get(s["id"])
+
+        formatted[s["id"]] = {
+            "segment_type": s["name"],
+            "event": event,
+            "rankings": rankings.get(event["id"], []) if event else [],
+            "samples": samples.get(event["id"], []) if event else []
+        }
+
+    return formatted
+
+
+# =========================
+# 💍 WIVES VS CHAD
+# =========================
+@overtime_segment_loader("Wives vs Chad")
+def _load_wives_vs_chad(conn, segments):
+    events = _first_rows(conn.execute(
+        text("""
+            SELECT
+                segment_id,
+                id,
+                theme,
+                winner,
+                notes
+            FROM overtime_wives_vs_chad_events
+            WHERE segment_id = ANY(:ids)
+        """),
+        {"ids": [s["id"] for s in segments]}
+    ).mappings().all(), "segment_id")
+
+    questions = {}
+
+    if events:
+        questions = _group_rows(conn.execute(
+            text("""
+                SELECT
+                    event_id,
+                    question_order,
+                    round_name,
+                    question_text,
+                    wives_answer,
+                    chad_answer,
+                    correct_answer,
+                    wives_correct,
+                    chad_correct,
+                    notes
+                FROM overtime_wives_vs_chad_questions
+                WHERE event_id = ANY(:event_ids)
+                ORDER BY event_id, question_order
+            """),
+            {"event_ids": [e["id"] for e in events.values()]}
+        ).mappings().all(), "event_id")
+
+    formatted = {}
+
+    for s in segments:
+        event = events.get(s["id"])
+
+        formatted[s["id"]] = {
+            "segment_type": s["name"],
+            "event": event,
+            "questions": questions.get(event["id"], []) if event else []
+        }
+
+    return formatted
+
+
+# =========================
+# 🌍 CULTURE CLASH
+# =========================
+@overtime_segment_loader("Culture Clash")
+def _load_culture_clash(conn, segments):
+    events = _first_rows(conn.execute(
+        text("""
+            SELECT
+                e.segment_id,
+                e.id,
+
+                c1.name AS team_a_country,
+                c1.flag_emoji AS team_a_flag,
+
+                c2.name AS team_b_country,
+                c2.flag_emoji AS team_b_flag,
+
+                e.notes
+            FROM culture_clash_events e
+            LEFT JOIN countries c1
+                ON c1.id = e.team_a_country_id
+            LEFT JOIN countries c2
+                ON c2.id = e.team_b_country_id
+            WHERE e.segment_id = ANY(:ids)
+        """),
+        {"ids": [s["id"] for s in segments]}
+    ).mappings().all(), "segment_id")
+
+    if not events:
+        return {}
+
+    event_ids = [e["id"] for e in events.values()]
+
+    items = _group_rows(conn.execute(
+        text("""
+            SELECT
+                i.event_id,
+                i.id,
+                i.item_order,
+                i.food_name,
+                i.correct_name,
+
+                c.name AS country_name,
+                c.flag_emoji,
+
+                i.points,
+                i.notes
+            FROM culture_clash_items i
+            JOIN countries c
+                ON c.id = i.country_id
+            WHERE i.event_id = ANY(:event_ids)
+            ORDER BY i.event_id, i.item_order
+        """),
+        {"event_ids": event_ids}
+    ).mappings().all(), "event_id")
+
+    guesses = _group_rows(conn.execute(
+        text("""
+            SELECT
+                g.item_id,
+                p.name AS player_name,
+                g.guess_text,
+                g.is_correct,
+                g.notes
+            FROM culture_clash_guesses g
+            JOIN culture_clash_items i
+                ON i.id = g.item_id
+            JOIN players p
+                ON p.id = g.player_id
+            WHERE i.event_id = ANY(:event_ids)
+            ORDER BY g.item_id, p.name
+        """),
+        {"event_ids": event_ids}
+    ).mappings().all(), "item_id")
+
+    formatted = {}
+
+    # Culture Clash segments without an event are left off the page.
+    for s in segments:
+        event = events.get(s["id"])
+
+        if not event:
+            continue
+
+        formatted[s["id"]] = {
+            "segment_type": s["name"],
+            "event": {
+                "team_a_country": event["team_a_country"],
+                "team_a_flag": event["team_a_flag"],
+
+                "team_b_country": event["team_b_country"],
+                "team_b_flag": event["team_b_flag"],
+
+                "notes": event["notes"]
+            },
+            "items": [
+                {
+                    "item_order": item["item_order"],
+                    "food_name": item["food_name"],
+                    "correct_name": item["correct_name"],
+                    "country_name": item["country_name"],
+                    "flag_emoji": item["flag_emoji"],
+                    "guesses": guesses.get(item["id"], [])
+                }
+                for item in items.get(event["id"], [])
+            ]
+        }
+
+    return formatted
+
+
+# =========================
+# 📺 COMMERCIAL CLASH
+# =========================
+@overtime_segment_loader("Commercial Clash")
+def _load_commercial_clash(conn, segments):
+    events = _first_rows(conn.execute(
+        text("""
+            SELECT
+                segment_id,
+                id,
+                sponsor_name,
+                notes
+            FROM overtime_commercial_clash_events
+            WHERE segment_id = ANY(:ids)
+        """),
+        {"ids": [s["id"] for s in segments]}
+    ).mappings().all(), "segment_id")
+
+    requirements = {}
+    teams = {}
+    members = {}
+
+    if events:
+        event_ids = [e["id"] for e in events.values()]
+
+        # Challenge requirements
+        requirements = _group_rows(conn.execute(
+            text("""
+                SELECT
+                    event_id,
+                    requirement_order,
+                    requirement_text
+                FROM overtime_commercial_clash_requirements
+                WHERE event_id = ANY(:event_ids)
+                ORDER BY event_id, requirement_order
+            """),
+            {"event_ids": event_ids}
+        ).mappings().all(), "event_id")
+
+        # Teams
+        teams = _group_rows(conn.execute(
+            text("""
+                SELECT
+                    event_id,
+                    id,
+                    team_number,
+                    commercial_theme,
+                    commercial_title,
+                    commercial_summary,
+                    is_winner,
+                    notes
+                FROM overtime_commercial_clash_teams
+                WHERE event_id = ANY(:event_ids)
+                ORDER BY event_id, team_number
+            """),
+            {"event_ids": event_ids}
+        ).mappings().all(), "event_id")
+
+        members = _group_rows(conn.execute(
+            text("""
+                SELECT
+                    tm.team_id,
+                    p.name AS player_name
+                FROM overtime_commercial_clash_team_members tm
+                JOIN overtime_commercial_clash_teams t
+                    ON t.id = tm.team_id
+                JOIN players p
+                    ON p.id = tm.player_id
+                WHERE t.event_id = ANY(:event_ids)
+                ORDER BY tm.team_id, p.name
+            """),
+            {"event_ids": event_ids}
+        ).mappings().all(), "team_id")
+
+    formatted = {}
+
+    for s in segments:
+        event = events.get(s["id"])
+
+        formatted[s["id"]] = {
+            "segment_type": s["name"],
+            "event": {
+                "sponsor_name": event["sponsor_name"],
+                "notes": event["notes"]
+            } if event else None,
+            "requirements": requirements.get(event["id"], []) if event else [],
+            "teams": [
+                {
+                    "team_number": team["team_number"],
+                    "commercial_theme": team["commercial_theme"],
+                    "commercial_title": team["commercial_title"],
+                    "commercial_summary": team["commercial_summary"],
+                    "is_winner": team["is_winner"],
+                    "notes": team["notes"],
+                    "members": members.get(team["id"], [])
+                }
+                for team in (teams.get(event["id"], []) if event else [])
+            ]
+        }
+
+    return formatted
+
+
+def _load_unstructured_segments(conn, segments):
+    return {
+        s["id"]: {
+            "segment_type": s["name"],
+            "title": s["title"],
+            "notes": s["notes"],
+            "data": None
+        }
+        for s in segments
+    }
+
+
+@cached(maxsize=512)
+def get_overtime_view(video_id: int):
+    with connect() as conn:
+
+        # 1️⃣ Get segments for this video's episode
         segments = conn.execute(
             text("""
                 SELECT
@@ -309,675 +1210,48 @@ def get_overtime_view(video_id: int):
                 FROM overtime_segments os
                 JOIN overtime_segment_types st
                 ON st.id = os.segment_type_id
-                WHERE os.episode_id = :episode_id
+                WHERE os.episode_id = (
+                    SELECT id
+                    FROM overtime_episodes
+                    WHERE video_id = :video_id
+                    LIMIT 1
+                )
                 ORDER BY os.segment_order NULLS LAST, os.id
             """),
-            {"episode_id": episode["id"]}
+            {"video_id": video_id}
         ).mappings().all()
 
         if not segments:
             return None
 
-        formatted_segments = []
+        # 2️⃣ Batch segments by type and run each type's loader once
+        segments_by_loader = defaultdict(list)
 
         for segment in segments:
+            canonical_type = segment["canonical_name"] or segment["name"]
+            loader = OVERTIME_SEGMENT_LOADERS.get(
+                canonical_type,
+                _load_unstructured_segments
+            )
+            segments_by_loader[loader].append(segment)
 
-            segment_id = segment["id"]
-            raw_type = segment["name"]
-            canonical_type = segment["canonical_name"] or raw_type
-
-            # =========================
-            # 🎬 COOL NOT COOL
-            # =========================
-            if canonical_type in ("Cool Not Cool", "Not Cool Cool"):
-
-                items = conn.execute(
-                    text("""
-                        SELECT
-                            i.id,
-                            i.item_name,
-                            p.name AS presenter_name
-                        FROM overtime_segment_items i
-                        LEFT JOIN players p
-                          ON p.id = i.presenter_id
-                        WHERE i.segment_id = :segment_id
-                        ORDER BY i.id
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().all()
-
-                formatted_items = []
-
-                for item in items:
-                    votes = conn.execute(
-                        text("""
-                            SELECT
-                                pl.name AS voter_name,
-                                v.vote
-                            FROM overtime_segment_item_votes v
-                            JOIN players pl
-                              ON pl.id = v.voter_id
-                            WHERE v.item_id = :item_id
-                            ORDER BY pl.name
-                        """),
-                        {"item_id": item["id"]}
-                    ).mappings().all()
-
-                    vote_values = [v["vote"] for v in votes]
-                    cool_count = vote_values.count("cool")
-                    not_cool_count = vote_values.count("not_cool")
-                    total_votes = len(vote_values)
-
-                    overall = None
-
-                    if total_votes > 0 and cool_count == total_votes:
-                        overall = "super_cool"
-                    elif total_votes > 0 and not_cool_count == total_votes:
-                        overall = "super_not_cool"
-                    elif cool_count > not_cool_count:
-                        overall = "cool"
-                    elif not_cool_count > cool_count:
-                        overall = "not_cool"
-                    elif cool_count == not_cool_count:
-                        overall = "tie"
-
-
-                    formatted_items.append({
-                        "item_name": item["item_name"],
-                        "presenter_name": item["presenter_name"],
-                        "votes": [dict(v) for v in votes],
-                        "overall": overall
-                    })
-
-                formatted_segments.append({
-                    "segment_type": canonical_type,
-                    "display_name": raw_type,
-                    "items": formatted_items
-                })
-
-
-            # =========================
-            # 🎡 WHEEL SEGMENT
-            # =========================
-            elif canonical_type in ("Wheel Unfortunate", "Wheel Fortunate"):
-
-                events = conn.execute(
-                text("""
-                    SELECT
-                        w.id,
-                        sp.name AS selected_player,
-                        hp.name AS host_name,
-                        w.mechanism,
-                        w.outcome_type,
-                        w.outcome_text
-                    FROM overtime_wheel_events w
-                    LEFT JOIN players sp
-                    ON sp.id = w.selected_player_id
-                    LEFT JOIN players hp
-                    ON hp.id = w.host_id
-                    WHERE w.segment_id = :segment_id
-                    ORDER BY w.id
-                """),
-                {"segment_id": segment_id}
-                ).mappings().all()
-
-                formatted_segments.append({
-                    "segment_type": raw_type,
-                    "events": [dict(e) for e in events]
-                })
-
-            # =========================
-            # 🎯 BETCHA
-            # =========================
-            elif canonical_type == "Betcha":
-
-                event = conn.execute(
-                    text("""
-                        SELECT
-                            p.name AS presenter_name,
-                            b.bet_description,
-                            b.outcome
-                        FROM overtime_betcha_events b
-                        JOIN players p
-                        ON p.id = b.presenter_id
-                        WHERE b.segment_id = :segment_id
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().first()
-
-                votes = conn.execute(
-                    text("""
-                        SELECT
-                            pl.name AS voter_name,
-                            v.vote
-                        FROM overtime_betcha_votes v
-                        JOIN players pl
-                          ON pl.id = v.voter_id
-                        WHERE v.segment_id = :segment_id
-                        ORDER BY pl.name
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().all()
-
-                formatted_segments.append({
-                    "segment_type": raw_type,
-                    "event": dict(event) if event else None,
-                    "votes": [dict(v) for v in votes]
-                })
-
-            # =========================
-            # 🎨 GET CRAFTY
-            # =========================
-            elif canonical_type == "Get Crafty":
-
-                event = conn.execute(
-                    text("""
-                        SELECT
-                            challenge_name,
-                            description,
-                            winner_id,
-                            notes
-                        FROM overtime_get_crafty_events
-                        WHERE segment_id = :segment_id
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().first()
-
-                participants = conn.execute(
-                    text("""
-                        SELECT
-                            p.name AS player_name,
-                            gp.placement,
-                            gp.notes
-                        FROM overtime_get_crafty_participants gp
-                        JOIN players p
-                            ON p.id = gp.player_id
-                        JOIN overtime_get_crafty_events ge
-                            ON ge.id = gp.event_id
-                        WHERE ge.segment_id = :segment_id
-                        ORDER BY
-                            gp.placement NULLS LAST,
-                            p.name
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().all()
-
-                formatted_segments.append({
-                    "segment_type": raw_type,
-                    "event": dict(event) if event else None,
-                    "participants": [dict(p) for p in participants]
-                })
-            
-            # =========================
-            # 🎮 DEFAULT / PARTICIPANT SEGMENTS
-            # =========================
-            elif canonical_type == "Game Time":
-                event = conn.execute(
-                    text("""
-                        SELECT
-                            e.id,
-                            e.game_description,
-                            e.score_label,
-                            e.win_condition,
-                            p.name AS winner_name
-                        FROM overtime_game_time_events e
-                        LEFT JOIN players p
-                        ON p.id = e.winner_player_id
-                        WHERE e.segment_id = :segment_id
-                        LIMIT 1
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().first()
-
-
-                results = []
-
-                if event is not None:
-                    results = conn.execute(
-                        text("""
-                            SELECT
-                                p.name,
-                                r.score_display,
-                                r.is_winner
-                            FROM overtime_game_time_results r
-                            JOIN players p ON p.id = r.player_id
-                            WHERE r.event_id = :event_id
-                            ORDER BY r.score_numeric DESC NULLS LAST
-                        """),
-                        {"event_id": event["id"]}
-                    ).mappings().all()
-
-                formatted_segments.append({
-                    "segment_type": raw_type,
-                    "event": dict(event) if event else None,
-                    "results": [dict(r) for r in results]
-                })
-            elif canonical_type == "Absurd Recurds":
-                record = conn.execute(
-                    text("""
-                        SELECT
-                            ar.record_description,
-                            p.name AS player_name,
-                            ar.outcome,
-                            ar.notes
-                        FROM overtime_absurd_recurds ar
-                        LEFT JOIN players p
-                        ON p.id = ar.player_id
-                        WHERE ar.segment_id = :segment_id
-                        LIMIT 1
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().first()
-
-                formatted_segments.append({
-                "segment_type": raw_type,
-                "record": dict(record) if record else None
-                })
-                            
-            elif canonical_type == "Judge Dudy":
-
-                case = conn.execute(
-                    text("""
-                        SELECT
-                            c.id,
-                            c.case_title,
-                            c.case_description,
-                            c.verdict
-                        FROM overtime_judge_dudy_cases c
-                        WHERE c.segment_id = :segment_id
-                        LIMIT 1
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().first()
-
-                participants = []
-
-                if case:
-                    participants = conn.execute(
-                        text("""
-                            SELECT
-                                p.name,
-                                j.role
-                            FROM overtime_judge_dudy_participants j
-                            JOIN players p
-                              ON p.id = j.player_id
-                            WHERE j.case_id = :case_id
-                        """),
-                        {"case_id": case["id"]}
-                    ).mappings().all()
-
-                # Convert participants into role dictionary
-                
-                role_map = defaultdict(list)
-
-                for p in participants:
-                    role_map[p["role"]].append(p["name"])
-
-                role_map = dict(role_map)
-
-                
-                formatted_segments.append({
-                    "segment_type": raw_type,
-                    "case": {
-                        "title": case["case_title"] if case else None,
-                        "description": case["case_description"] if case else None,
-                        "verdict": case["verdict"] if case else None,
-                        "participants": role_map
-                    } if case else None
-                })
-            elif canonical_type in ("Top 10", "Not Top 10", "Top 15"):
-                event = conn.execute(
-                    text("""
-                        SELECT
-                            tle.id,
-                            tle.title,
-                            p.name AS presenter_name
-                        FROM overtime_top_list_events tle
-                        LEFT JOIN players p
-                            ON p.id = tle.presenter_id
-                        WHERE tle.segment_id = :segment_id
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().first()
-
-                entries = []
-
-                if event:
-                    entries = conn.execute(
-                        text("""
-                            SELECT
-                                i.id,
-                                i.rank,
-                                i.rank_display,
-                                i.item_text,
-                                i.item_type,
-                                i.reveal_order,
-                                m.media_type,
-                                m.media_url,
-                                m.alt_text
-                            FROM overtime_top_list_items i
-                            LEFT JOIN overtime_top_list_item_media m
-                                ON m.item_id = i.id
-                            WHERE i.event_id = :event_id
-                            ORDER BY
-                                CASE
-                                    WHEN i.item_type = 'ranked' THEN 0
-                                    ELSE 1
-                                END,
-                                i.rank DESC,
-                                i.reveal_order ASC NULLS LAST;
-                        """),
-                        {"event_id": event["id"]}
-                    ).mappings().all()
-
-                formatted_segments.append({
-                    "segment_type": raw_type,
-                    "event": dict(event) if event else None,
-                    "entries": [
-                        dict(e) for e in entries
-                        if e["item_type"] == "ranked"
-                    ],
-                    "honorable_mentions": [
-                        dict(e) for e in entries
-                        if e["item_type"] == "honorable_mention"
-                    ]
-                })
-            elif canonical_type == "Taste Test":
-
-                event = conn.execute(
-                    text("""
-                        SELECT
-                            e.id,
-                            e.food_item,
-                            p.name AS participant_name
-                        FROM overtime_taste_test_events e
-                        LEFT JOIN players p
-                            ON p.id = e.participant_id
-                        WHERE e.segment_id = :segment_id
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().first()
-                samples = []
-                rankings = []
-
-                if event:
-
-                    samples = conn.execute(
-                        text("""
-                            SELECT
-                                sample_label,
-                                actual_item,
-                                guessed_item,
-                                LOWER(actual_item) = LOWER(guessed_item) AS guess_correct
-                            FROM overtime_taste_test_samples
-                            WHERE event_id = :event_id
-                            ORDER BY sample_label
-                        """),
-                        {"event_id": event["id"]}
-                    ).mappings().all()
-
-                    rankings = conn.execute(
-                        text("""
-                            SELECT
-                                r.placement,
-                                s.sample_label,
-                                s.actual_item,
-                                s.guessed_item,
-                                LOWER(s.actual_item) = LOWER(s.guessed_item) AS guess_correct
-                            FROM overtime_taste_test_rankings r
-                            JOIN overtime_taste_test_samples s
-                                ON s.id = r.sample_id
-                            WHERE s.event_id = :event_id
-                            ORDER BY r.placement
-                        """),
-                        {"event_id": event["id"]}
-                    ).mappings().all()
-                formatted_segments.append({
-                    "segment_type": raw_type,
-                    "event": dict(event) if event else None,
-                    "rankings": [dict(r) for r in rankings],
-                    "samples": [dict(s) for s in samples]
-                })
-            elif canonical_type == "Wives vs Chad":
-                event = conn.execute(
-                    text("""
-                        SELECT
-                            id,
-                            theme,
-                            winner,
-                            notes
-                        FROM overtime_wives_vs_chad_events
-                        WHERE segment_id = :segment_id
-                        LIMIT 1
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().first()
-
-                questions = []
-
-                if event:
-                    questions = conn.execute(
-                        text("""
-                            SELECT
-                                question_order,
-                                round_name,
-                                question_text,
-                                wives_answer,
-                                chad_answer,
-                                correct_answer,
-                                wives_correct,
-                                chad_correct,
-                                notes
-                            FROM overtime_wives_vs_chad_questions
-                            WHERE event_id = :event_id
-                            ORDER BY question_order
-                        """),
-                        {"event_id": event["id"]}
-                    ).mappings().all()
-
-                formatted_segments.append({
-                    "segment_type": raw_type,
-                    "event": dict(event) if event else None,
-                    "questions": [dict(q) for q in questions]
-                })
-            elif canonical_type == "Culture Clash":
-                print(segment)
-                event = conn.execute(
-                    text("""
-                        SELECT
-                            e.id,
-
-                            c1.name AS team_a_country,
-                            c1.flag_emoji AS team_a_flag,
-
-                            c2.name AS team_b_country,
-                            c2.flag_emoji AS team_b_flag,
-
-                            e.notes
-                        FROM culture_clash_events e
-                        LEFT JOIN countries c1
-                            ON c1.id = e.team_a_country_id
-                        LEFT JOIN countries c2
-                            ON c2.id = e.team_b_country_id
-                        WHERE e.segment_id = :segment_id
-                        LIMIT 1
-                    """),
-                    {
-                        "segment_id": segment["id"]
-                    }
-                ).mappings().first()
-                print(event)
-                if event:
-
-                    item_rows = conn.execute(
-                        text("""
-                            SELECT
-                                i.id,
-                                i.item_order,
-                                i.food_name,
-                                i.correct_name,
-
-                                c.name AS country_name,
-                                c.flag_emoji,
-
-                                i.points,
-                                i.notes
-                            FROM culture_clash_items i
-                            JOIN countries c
-                                ON c.id = i.country_id
-                            WHERE i.event_id = :event_id
-                            ORDER BY i.item_order
-                        """),
-                        {
-                            "event_id": event["id"]
-                        }
-                    ).mappings().all()
-
-                    culture_clash_items = []
-
-                    for item in item_rows:
-
-                        guess_rows = conn.execute(
-                            text("""
-                                SELECT
-                                    p.name AS player_name,
-                                    g.guess_text,
-                                    g.is_correct,
-                                    g.notes
-                                FROM culture_clash_guesses g
-                                JOIN players p
-                                    ON p.id = g.player_id
-                                WHERE g.item_id = :item_id
-                                ORDER BY p.name
-                            """),
-                            {
-                                "item_id": item["id"]
-                            }
-                        ).mappings().all()
-
-                        culture_clash_items.append({
-                            "item_order": item["item_order"],
-                            "food_name": item["food_name"],
-                            "correct_name": item["correct_name"],
-                            "country_name": item["country_name"],
-                            "flag_emoji": item["flag_emoji"],
-                            "guesses": [
-                                dict(g)
-                                for g in guess_rows
-                            ]
-                        })
-
-                    formatted_segments.append({
-                        "segment_type": raw_type,
-                        "event": {
-                            "team_a_country": event["team_a_country"],
-                            "team_a_flag": event["team_a_flag"],
-
-                            "team_b_country": event["team_b_country"],
-                            "team_b_flag": event["team_b_flag"],
-
-                            "notes": event["notes"]
-                        },
-                        "items": culture_clash_items
-                    })
-            elif canonical_type == "Commercial Clash":
-                event = conn.execute(
-                    text("""
-                        SELECT
-                            id,
-                            sponsor_name,
-                            notes
-                        FROM overtime_commercial_clash_events
-                        WHERE segment_id = :segment_id
-                        LIMIT 1
-                    """),
-                    {"segment_id": segment_id}
-                ).mappings().first()
-
-                teams = []
-                requirements = []
-
-                if event:
-
-                    # Challenge requirements
-                    requirements = conn.execute(
-                        text("""
-                            SELECT
-                                requirement_order,
-                                requirement_text
-                            FROM overtime_commercial_clash_requirements
-                            WHERE event_id = :event_id
-                            ORDER BY requirement_order
-                        """),
-                        {"event_id": event["id"]}
-                    ).mappings().all()
-
-                    # Teams
-                    team_rows = conn.execute(
-                        text("""
-                            SELECT
-                                id,
-                                team_number,
-                                commercial_theme,
-                                commercial_title,
-                                commercial_summary,
-                                is_winner,
-                                notes
-                            FROM overtime_commercial_clash_teams
-                            WHERE event_id = :event_id
-                            ORDER BY team_number
-                        """),
-                        {"event_id": event["id"]}
-                    ).mappings().all()
-
-                    for team in team_rows:
-
-                        members = conn.execute(
-                            text("""
-                                SELECT
-                                    p.name AS player_name
-                                FROM overtime_commercial_clash_team_members tm
-                                JOIN players p
-                                    ON p.id = tm.player_id
-                                WHERE tm.team_id = :team_id
-                                ORDER BY p.name
-                            """),
-                            {"team_id": team["id"]}
-                        ).mappings().all()
-
-                        teams.append({
-                            "team_number": team["team_number"],
-                            "commercial_theme": team["commercial_theme"],
-                            "commercial_title": team["commercial_title"],
-                            "commercial_summary": team["commercial_summary"],
-                            "is_winner": team["is_winner"],
-                            "notes": team["notes"],
-                            "members": [dict(m) for m in members]
-                        })
-                formatted_segments.append({
-                    "segment_type": raw_type,
-                    "event": {
-                        "sponsor_name": event["sponsor_name"],
-                        "notes": event["notes"]
-                    } if event else None,
-                    "requirements": [dict(r) for r in requirements],
-                    "teams": teams
-                })
-            else:
-                formatted_segments.append({
-                    "segment_type": raw_type,
-                    "title": segment["title"],
-                    "notes": segment["notes"],
-                    "data": None
-                })
+        formatted_by_id = {}
 
+        for loader, typed_segments in segments_by_loader.items():
+            formatted_by_id.update(loader(conn, typed_segments))
 
-        return {
-            "segments": formatted_segments
-        }
+    # 3️⃣ Restore episode order
+    return {
+        "segments": [
+            formatted_by_id[s["id"]]
+            for s in segments
+            if s["id"] in formatted_by_id
+        ]
+    }
 
+@cached(maxsize=512)
 def get_bucket_list_view(video_id: int):
-    with engine.connect() as conn:
+    with connect() as conn:
 
         # 1️⃣ Find episode
         episode = conn.execute(
@@ -1016,8 +1290,9 @@ def get_bucket_list_view(video_id: int):
             "tasks": [dict(t) for t in tasks]
         }
 
+@cached(maxsize=512)
 def get_stereotypes_view(video_id: int):
-    with engine.connect() as conn:
+    with connect() as conn:
 
         # 1️⃣ Find episode
         episode = conn.execute(
@@ -1083,92 +1358,132 @@ def get_stereotypes_view(video_id: int):
             "segments": formatted_segments
         }
 
-def get_song_detail(song_id: int):
-    sql = text("""
-    SELECT
-        s.id               AS song_id,
-        s.title            AS song_title,
-        s.spotify_track_id AS spotify_track_id,
-        s.source_type      AS source_type,
-        s.source_url       AS source_url,
-        s.notes            AS notes,
-
-        a.name             AS artist_name,
-        sa.artist_order    AS artist_order,
-
-        v.id               AS video_id,
-        v.title            AS video_title,
-        v.youtube_video_id AS youtube_video_id
-
+# Detail documents are nested by Postgres: each list is a correlated
+# json_agg over its own table, so a row count never multiplies with
+# another list and the driver hands back the finished dict.
+SONG_DETAIL_DOCUMENT = text("""
+    SELECT json_build_object(
+        'id',               s.id,
+        'title',            s.title,
+        'spotify_track_id', s.spotify_track_id,
+        'source_type',      s.source_type,
+        'source_url',       s.source_url,
+        'notes',            s.notes,
+
+        'artists', COALESCE((
+            SELECT json_agg(x.name ORDER BY x.artist_order, x.name)
+            FROM (
+                SELECT DISTINCT ON (a.name) a.name, sa.artist_order
+                FROM song_artists sa
+                JOIN artists a ON a.id = sa.artist_id
+                WHERE sa.song_id = s.id
+                ORDER BY a.name, sa.artist_order
+            ) x
+        ), '[]'),
+
+        'videos', COALESCE((
+            SELECT json_agg(
+                json_build_object(
+                    'id',               v.id,
+                    'title',            v.title,
+                    'youtube_video_id', v.youtube_video_id
+                )
+                ORDER BY v.published_at, v.id
+            )
+            FROM videos v
+            WHERE v.id IN (
+                SELECT vs.video_id FROM video_songs vs WHERE vs.song_id = s.id
+            )
+        ), '[]')
+    ) AS document
     FROM songs s
-    LEFT JOIN song_artists sa ON sa.song_id = s.id
-    LEFT JOIN artists a       ON a.id = sa.artist_id
-    LEFT JOIN video_songs vs  ON vs.song_id = s.id
-    LEFT JOIN videos v        ON v.id = vs.video_id
-
     WHERE s.id = :song_id
-    ORDER BY sa.artist_order, v.published_at;
+""")
+
+def _document_bytes(document_sql):
+    # The same document serialized by Postgres, for the API to send as is.
+    return text(f"""
+        SELECT convert_to(d.document::text, 'UTF8')
+        FROM ({document_sql.text}) d
     """)
 
-    with engine.connect() as conn:
-        rows = conn.execute(sql, {"song_id": song_id}).mappings().all()
+SONG_DETAIL_JSON = _document_bytes(SONG_DETAIL_DOCUMENT)
 
-    if not rows:
-        return None
+@cached(maxsize=1024)
+def get_song_detail(song_id: int):
+    with connect() as conn:
+        return conn.execute(
+            SONG_DETAIL_DOCUMENT,
+            {"song_id": song_id}
+        ).scalar_one_or_none()
 
-    song = {
-    "id": rows[0]["song_id"],
-    "title": rows[0]["song_title"],
-    "spotify_track_id": rows[0]["spotify_track_id"],
-    "source_type": rows[0]["source_type"],
-    "source_url": rows[0]["source_url"],
-    "notes": rows[0]["notes"],
-    "artists": [],
-    "videos": []
+@cached(maxsize=1024)
+def get_song_detail_json(song_id: int):
+    with connect() as conn:
+        return conn.execute(
+            SONG_DETAIL_JSON,
+            {"song_id": song_id}
+        ).scalar_one_or_none()
+
+def _search_params(query: str, limit: int):
+    # `term` is compared for exact/prefix/similarity ranking; `contains`
+    # and `prefix` are LIKE patterns with the user's own % and _ escaped.
+    escaped = (
+        query.replace("\\", "\\\\")
+             .replace("%", "\\%")
+             .replace("_", "\\_")
+    )
+    return {
+        "term": query,
+        "contains": f"%{escaped}%",
+        "prefix": f"{escaped}%",
+        "limit": limit,
     }
 
-    seen_artists = set()
-    seen_videos = set()
-
-    for row in rows:
-        if row["artist_name"] and row["artist_name"] not in seen_artists:
-            song["artists"].append(row["artist_name"])
-            seen_artists.add(row["artist_name"])
-
-        if row["video_id"] and row["video_id"] not in seen_videos:
-            song["videos"].append({
-                "id": row["video_id"],
-                "title": row["video_title"],
-                "youtube_video_id": row["youtube_video_id"]
-            })
-            seen_videos.add(row["video_id"])
-
-    return song
+# Rank exact matches first, then prefix matches, then by trigram
+# similarity. `norm` is the indexed immutable_unaccent(lower(col)).
+SEARCH_RANK_SQL = """
+    CASE
+        WHEN {norm} = immutable_unaccent(lower(:term)) THEN 0
+        WHEN {norm} LIKE immutable_unaccent(lower(:prefix)) THEN 1
+        ELSE 2
+    END AS match_rank,
+    similarity({norm}, immutable_unaccent(lower(:term))) AS score
+"""
 
 def search_songs(query: str, limit: int = 50):
-    sql = text("""
+    sql = text(f"""
+        WITH matches AS (
+            SELECT
+                s.id,
+                s.title,
+                s.spotify_track_id,
+                {SEARCH_RANK_SQL.format(norm="immutable_unaccent(lower(s.title))")}
+            FROM songs s
+            WHERE immutable_unaccent(lower(s.title))
+                  LIKE immutable_unaccent(lower(:contains))
+              AND EXISTS (
+                  SELECT 1 FROM song_artists sa WHERE sa.song_id = s.id
+              )
+            ORDER BY match_rank, score DESC, s.title
+            LIMIT :limit
+        )
         SELECT
-     s.id,
-       s.title,
-       s.spotify_track_id,
-       array_agg(a.name ORDER BY sa.artist_order) AS artists
-    FROM songs s
-    JOIN song_artists sa ON sa.song_id = s.id
-    JOIN artists a ON a.id = sa.artist_id
-    WHERE unaccent(lower(s.title))
-                LIKE unaccent(lower(:q))
-    GROUP BY s.id
-    ORDER BY s.title
-    LIMIT :limit
+            m.id,
+            m.title,
+            m.spotify_track_id,
+            array_agg(a.name ORDER BY sa.artist_order) AS artists
+        FROM matches m
+        JOIN song_artists sa ON sa.song_id = m.id
+        JOIN artists a ON a.id = sa.artist_id
+        GROUP BY m.id, m.title, m.spotify_track_id, m.match_rank, m.score
+        ORDER BY m.match_rank, m.score DESC, m.title
     """)
 
-    with engine.connect() as conn:
+    with connect() as conn:
         rows = conn.execute(
             sql,
-            {
-                "q": f"%{query}%",
-                "limit": limit
-            }
+            _search_params(query, limit)
         ).mappings().all()
 
     # Convert RowMapping → dict
@@ -1182,121 +1497,110 @@ def search_songs(query: str, limit: int = 50):
     for row in rows
     ]
 
-def get_all_artists():
-    sql = text("""
-        SELECT
-            a.id,
-            a.name,
-
-            CASE
-                WHEN LEFT(a.name, 1) ~* '^[A-Z]$'
-                    THEN UPPER(LEFT(a.name, 1))
-                ELSE '#'
-            END AS letter_group,
-
-            COUNT(DISTINCT sa.song_id) AS song_count
-
-        FROM artists a
-
-        LEFT JOIN song_artists sa
-            ON sa.artist_id = a.id
-
-        GROUP BY a.id, a.name
-
-        ORDER BY
-            CASE
-                WHEN LEFT(a.name, 1) ~* '^[A-Z]$' THEN 1
-                ELSE 0
-            END,
-            UPPER(a.name)
+# =========================
+# Letter-sharded listings
+# =========================
+#
+# /songs and /artists render one letter group at a time. letter_group
+# and sort_key are stored columns (migrations/004), so a group is one
+# index range and the letter bar comes from a single GROUP BY that also
+# gives each group's size.
+
+LETTER_GROUPS = ("#",) + tuple(chr(n) for n in range(ord("A"), ord("Z") + 1))
+
+def letter_anchor(group: str) -> str:
+    return "number" if group == "#" else group
+
+def letter_group_for(anchor: str):
+    if anchor == "number":
+        return "#"
+    if len(anchor) == 1 and anchor.upper() in LETTER_GROUPS:
+        return anchor.upper()
+    return None
+
+def _letter_bar(table: str, where: str = "true"):
+    # `where` must match the listing's own filter, or a letter can show
+    # as available and then open on an empty section.
+    sql = text(f"""
+        SELECT t.letter_group, COUNT(*) AS total
+        FROM {table} t
+        WHERE {where}
+        GROUP BY t.letter_group
     """)
 
-    with engine.connect() as conn:
-        rows = conn.execute(sql).mappings().all()
+    with connect() as conn:
+        totals = dict(conn.execute(sql).all())
 
-    return [dict(row) for row in rows]
+    return [
+        {
+            "letter": group,
+            "anchor": letter_anchor(group),
+            "available": group in totals,
+            "count": totals.get(group, 0),
+        }
+        for group in LETTER_GROUPS
+    ]
 
+@cached(maxsize=1)
 def get_artist_letters():
-    sql = text("""
-        WITH available_groups AS (
-            SELECT DISTINCT
-                CASE
-                    WHEN LEFT(name, 1) ~* '[A-Z]'
-                        THEN UPPER(LEFT(name, 1))
-                    ELSE '#'
-                END AS letter
-            FROM artists
-            WHERE name IS NOT NULL
-              AND name <> ''
-        ),
-        letters AS (
-            SELECT
-                '#' AS letter,
-                'number' AS anchor,
-                0 AS sort_order
+    return _letter_bar("artists")
 
-            UNION ALL
-
-            SELECT
-                chr(n) AS letter,
-                chr(n) AS anchor,
-                n - 64 AS sort_order
-            FROM generate_series(65, 90) AS n
-        )
+@cached(maxsize=len(LETTER_GROUPS))
+def get_artists_by_letter(letter_group: str):
+    sql = text("""
         SELECT
-            l.letter,
-            l.anchor,
-            (ag.letter IS NOT NULL) AS available
-        FROM letters l
-        LEFT JOIN available_groups ag
-            ON ag.letter = l.letter
-        ORDER BY l.sort_order
+            a.id,
+            a.name,
+            a.letter_group,
+            a.song_count
+        FROM artists a
+        WHERE a.letter_group = :letter_group
+        ORDER BY a.sort_key, a.id
     """)
 
-    with engine.connect() as conn:
-        rows = conn.execute(sql).mappings().all()
+    with connect() as conn:
+        rows = conn.execute(
+            sql,
+            {"letter_group": letter_group}
+        ).mappings().all()
 
     return [dict(row) for row in rows]
 
-def get_all_songs():
+@cached(maxsize=1)
+def get_song_letters():
+    # Songs are listed only with their credited artists.
+    return _letter_bar(
+        "songs",
+        "EXISTS (SELECT 1 FROM song_artists sa WHERE sa.song_id = t.id)"
+    )
+
+@cached(maxsize=len(LETTER_GROUPS))
+def get_songs_by_letter(letter_group: str):
     sql = text("""
         SELECT
             s.id,
             s.title,
             s.spotify_track_id,
-
-            CASE
-                WHEN LEFT(s.title, 1) ~* '[A-Z]'
-                    THEN UPPER(LEFT(s.title, 1))
-                ELSE '#'
-            END AS letter_group,
-
+            s.letter_group,
             array_agg(
                 a.name
                 ORDER BY sa.artist_order
             ) AS artists
-
         FROM songs s
-
         JOIN song_artists sa
             ON sa.song_id = s.id
-
         JOIN artists a
             ON a.id = sa.artist_id
-
+        WHERE s.letter_group = :letter_group
         GROUP BY s.id
-
-        ORDER BY
-            CASE
-                WHEN LEFT(s.title, 1) ~* '[A-Z]'
-                    THEN ASCII(UPPER(LEFT(s.title, 1)))
-                ELSE 0
-            END,
-            s.title
+        ORDER BY s.sort_key, s.id
     """)
 
-    with engine.connect() as conn:
-        rows = conn.execute(sql).mappings().all()
+    with connect() as conn:
+        rows = conn.execute(
+            sql,
+            {"letter_group": letter_group}
+        ).mappings().all()
 
     return [
         {
@@ -1309,55 +1613,6 @@ def get_all_songs():
         for row in rows
     ]
 
-def get_song_letters():
-    sql = text("""
-        WITH available_groups AS (
-            SELECT DISTINCT
-                CASE
-                    WHEN LEFT(title, 1) ~* '[A-Z]'
-                        THEN UPPER(LEFT(title, 1))
-                    ELSE '#'
-                END AS letter
-            FROM songs
-            WHERE title IS NOT NULL
-              AND title <> ''
-        ),
-        letters AS (
-            SELECT
-                '#' AS letter,
-                'number' AS anchor,
-                0 AS sort_order
-
-            UNION ALL
-
-            SELECT
-                chr(n) AS letter,
-                chr(n) AS anchor,
-                n - 64 AS sort_order
-            FROM generate_series(65, 90) AS n
-        )
-        SELECT
-            l.letter,
-            l.anchor,
-            (ag.letter IS NOT NULL) AS available
-        FROM letters l
-        LEFT JOIN available_groups ag
-            ON ag.letter = l.letter
-        ORDER BY l.sort_order
-    """)
-
-    with engine.connect() as conn:
-        rows = conn.execute(sql).mappings().all()
-
-    return [
-        {
-            "letter": row["letter"],
-            "anchor": row["anchor"],
-            "available": row["available"],
-        }
-        for row in rows
-    ]
-
 def get_song_by_track_id(track_id: str):
     sql = text("""
         SELECT
@@ -1372,7 +1627,7 @@ def get_song_by_track_id(track_id: str):
         LIMIT 1
     """)
 
-    with engine.connect() as conn:
+    with connect() as conn:
         row = conn.execute(
             sql,
             {"track_id": track_id}
@@ -1388,28 +1643,33 @@ def get_song_by_track_id(track_id: str):
     }
 
 def search_artists(query: str, limit: int = 50):
-    sql = text("""
+    sql = text(f"""
+        WITH matches AS (
+            SELECT
+                a.id,
+                a.name,
+                a.spotify_artist_id,
+                a.song_count,
+                {SEARCH_RANK_SQL.format(norm="immutable_unaccent(lower(a.name))")}
+            FROM artists a
+            WHERE immutable_unaccent(lower(a.name))
+                  LIKE immutable_unaccent(lower(:contains))
+            ORDER BY match_rank, score DESC, a.name
+            LIMIT :limit
+        )
         SELECT
-          a.id,
-          a.name,
-          a.spotify_artist_id,
-          COUNT(DISTINCT sa.song_id) AS song_count
-        FROM artists a
-        LEFT JOIN song_artists sa ON sa.artist_id = a.id
-        WHERE unaccent(lower(a.name))
-              LIKE unaccent(lower(:q))
-        GROUP BY a.id
-        ORDER BY a.name
-        LIMIT :limit
+            m.id,
+            m.name,
+            m.spotify_artist_id,
+            m.song_count
+        FROM matches m
+        ORDER BY m.match_rank, m.score DESC, m.name
     """)
 
-    with engine.connect() as conn:
+    with connect() as conn:
         rows = conn.execute(
             sql,
-            {
-                "q": f"%{query}%",
-                "limit": limit
-            }
+            _search_params(query, limit)
         ).mappings().all()
 
     return [
@@ -1423,28 +1683,207 @@ def search_artists(query: str, limit: int = 50):
     ]
 
 def search_videos(query: str, limit: int = 50):
+    sql = text(f"""
+        WITH matches AS (
+            SELECT
+                v.id,
+                v.title,
+                v.youtube_video_id,
+                v.published_at,
+                v.song_count,
+                {SEARCH_RANK_SQL.format(norm="immutable_unaccent(lower(v.title))")}
+            FROM videos v
+            WHERE immutable_unaccent(lower(v.title))
+                  LIKE immutable_unaccent(lower(:contains))
+            ORDER BY match_rank, score DESC, v.published_at DESC
+            LIMIT :limit
+        )
+        SELECT
+            m.id,
+            m.title,
+            m.youtube_video_id,
+            m.published_at,
+            m.song_count
+        FROM matches m
+        ORDER BY m.match_rank, m.score DESC, m.published_at DESC
+    """)
+
+    with connect() as conn:
+        rows = conn.execute(
+            sql,
+            _search_params(query, limit)
+        ).mappings().all()
+
+    return [
+        {
+            "id": row["id"],
+            "title": row["title"],
+            "youtube_video_id": row["youtube_video_id"],
+            "published_at": row["published_at"],
+            "song_count": row["song_count"],
+        }
+        for row in rows
+    ]
+
+def search_all(query: str, per_type: int = 10):
+    # Songs, artists and videos in one round trip: each branch is limited
+    # and ranked on its own, then the rows are regrouped by kind.
+    # Placeholder NULLs are typed: UNION resolves column types pairwise,
+    # and a bare NULL would be taken as text before meeting published_at.
+    sql = text(f"""
+        SELECT
+            m.kind,
+            m.id,
+            m.label,
+            m.spotify_id,
+            m.youtube_video_id,
+            m.published_at,
+            CASE WHEN m.kind = 'song' THEN (
+                SELECT array_agg(a.name ORDER BY sa.artist_order)
+                FROM song_artists sa
+                JOIN artists a ON a.id = sa.artist_id
+                WHERE sa.song_id = m.id
+            ) END AS artists,
+            m.song_count
+        FROM (
+            (
+                SELECT
+                    'song' AS kind,
+                    s.id,
+                    s.title AS label,
+                    s.spotify_track_id AS spotify_id,
+                    NULL::text AS youtube_video_id,
+                    NULL::timestamptz AS published_at,
+                    NULL::integer AS song_count,
+                    {SEARCH_RANK_SQL.format(norm="immutable_unaccent(lower(s.title))")}
+                FROM songs s
+                WHERE immutable_unaccent(lower(s.title))
+                      LIKE immutable_unaccent(lower(:contains))
+                  AND EXISTS (
+                      SELECT 1 FROM song_artists sa WHERE sa.song_id = s.id
+                  )
+                ORDER BY match_rank, score DESC, s.title
+                LIMIT :limit
+            )
+            UNION ALL
+            (
+                SELECT
+                    'artist',
+                    a.id,
+                    a.name,
+                    a.spotify_artist_id,
+                    NULL::text,
+                    NULL::timestamptz,
+                    a.song_count,
+                    {SEARCH_RANK_SQL.format(norm="immutable_unaccent(lower(a.name))")}
+                FROM artists a
+                WHERE immutable_unaccent(lower(a.name))
+                      LIKE immutable_unaccent(lower(:contains))
+                ORDER BY match_rank, score DESC, a.name
+                LIMIT :limit
+            )
+            UNION ALL
+            (
+                SELECT
+                    'video',
+                    v.id,
+                    v.title,
+                    NULL::text,
+                    v.youtube_video_id,
+                    v.published_at::timestamptz,
+                    v.song_count,
+                    {SEARCH_RANK_SQL.format(norm="immutable_unaccent(lower(v.title))")}
+                FROM videos v
+                WHERE immutable_unaccent(lower(v.title))
+                      LIKE immutable_unaccent(lower(:contains))
+                ORDER BY match_rank, score DESC, v.published_at DESC
+                LIMIT :limit
+            )
+        ) m
+        ORDER BY m.kind, m.match_rank, m.score DESC
+    """)
+
+    with connect() as conn:
+        rows = conn.execute(
+            sql,
+            _search_params(query, per_type)
+        ).mappings().all()
+
+    results = {"query": query, "songs": [], "artists": [], "videos": []}
+
+    for row in rows:
+        if row["kind"] == "song":
+            results["songs"].append({
+                "id": row["id"],
+                "title": row["label"],
+                "spotify_track_id": row["spotify_id"],
+                "artists": row["artists"] or [],
+            })
+        elif row["kind"] == "artist":
+            results["artists"].append({
+                "id": row["id"],
+                "name": row["label"],
+                "spotify_artist_id": row["spotify_id"],
+                "song_count": row["song_count"],
+            })
+        else:
+            results["videos"].append({
+                "id": row["id"],
+                "title": row["label"],
+                "youtube_video_id": row["youtube_video_id"],
+                "published_at": row["published_at"],
+                "song_count": row["song_count"],
+            })
+
+    return results
+
+# ts_headline() doesn't escape the document text, so matches are wrapped
+# in control characters and turned into <mark> after escaping.
+EPISODE_SNIPPET_OPTIONS = (
+    "StartSel=\x01, StopSel=\x02, MaxFragments=2, "
+    "MaxWords=24, MinWords=8, FragmentDelimiter=\" … \""
+)
+
+def search_episodes(query: str, limit: int = 20):
+    # Matches episode text (battle rules, overtime items, segments,
+    # tasks) through video_search_documents, which triggers keep in
+    # sync (migrations/002). Snippets are only built for the rows
+    # returned, never for every match.
     sql = text("""
+        WITH q AS (
+            SELECT websearch_to_tsquery(
+                'english', immutable_unaccent(:term)
+            ) AS query
+        ),
+        hits AS (
+            SELECT
+                d.video_id,
+                d.body,
+                ts_rank_cd(d.document, q.query) AS score
+            FROM video_search_documents d, q
+            WHERE d.document @@ q.query
+            ORDER BY score DESC, d.video_id
+            LIMIT :limit
+        )
         SELECT
-          v.id,
-          v.title,
-          v.youtube_video_id,
-          v.published_at,
-          COUNT(DISTINCT vs.song_id) AS song_count
-        FROM videos v
-        LEFT JOIN video_songs vs ON vs.video_id = v.id
-        WHERE unaccent(lower(v.title))
-              LIKE unaccent(lower(:q))
-        GROUP BY v.id
-        ORDER BY v.published_at DESC
-        LIMIT :limit
+            v.id,
+            v.title,
+            v.youtube_video_id,
+            v.published_at,
+            ts_headline('english', h.body, q.query, :options) AS snippet
+        FROM hits h
+        CROSS JOIN q
+        JOIN videos v ON v.id = h.video_id
+        ORDER BY h.score DESC, v.id
     """)
 
-    with engine.connect() as conn:
+    with connect() as conn:
         rows = conn.execute(
             sql,
             {
-                "q": f"%{query}%",
-                "limit": limit
+                "term": query.strip(),
+                "limit": limit,
+                "options": EPISODE_SNIPPET_OPTIONS,
             }
         ).mappings().all()
 
@@ -1454,7 +1893,9 @@ def search_videos(query: str, limit: int = 50):
             "title": row["title"],
             "youtube_video_id": row["youtube_video_id"],
             "published_at": row["published_at"],
-            "song_count": row["song_count"],
+            "snippet": html.escape(row["snippet"])
+                .replace("\x01", "<mark>")
+                .replace("\x02", "</mark>"),
         }
         for row in rows
     ]
@@ -1474,7 +1915,7 @@ def get_video_detail(video_id: int):
         ORDER BY s.title
     """)
 
-    with engine.connect() as conn:
+    with connect() as conn:
         rows = conn.execute(
             sql,
             {"video_id": video_id}
@@ -1489,6 +1930,7 @@ def get_video_detail(video_id: int):
         for row in rows
     ]
 
+@cached(maxsize=1024)
 def get_video_detail_page(video_id: int):
     sql = text("""
         SELECT
@@ -1511,7 +1953,7 @@ def get_video_detail_page(video_id: int):
             ORDER BY COALESCE(vs.song_order, s.id), sa.artist_order
     """)
 
-    with engine.connect() as conn:
+    with connect() as conn:
         rows = conn.execute(
             sql,
             {"video_id": video_id}
@@ -1548,72 +1990,63 @@ def get_video_detail_page(video_id: int):
     video["songs"] = list(video["songs"].values())
     return video
 
+ARTIST_DETAIL_DOCUMENT = text("""
+    SELECT json_build_object(
+        'id',                a.id,
+        'name',              a.name,
+        'spotify_artist_id', a.spotify_artist_id,
+
+        'songs', COALESCE((
+            SELECT json_agg(
+                json_build_object(
+                    'id',               s.id,
+                    'title',            s.title,
+                    'spotify_track_id', s.spotify_track_id,
+
+                    'videos', COALESCE((
+                        SELECT json_agg(
+                            json_build_object(
+                                'title',            v.title,
+                                'youtube_video_id', v.youtube_video_id
+                            )
+                            ORDER BY v.title, v.id
+                        )
+                        FROM video_songs vs
+                        JOIN videos v ON v.id = vs.video_id
+                        WHERE vs.song_id = s.id
+                    ), '[]')
+                )
+                ORDER BY s.title, s.id
+            )
+            FROM songs s
+            WHERE s.id IN (
+                SELECT sa.song_id FROM song_artists sa WHERE sa.artist_id = a.id
+            )
+        ), '[]')
+    ) AS document
+    FROM artists a
+    WHERE a.id = :artist_id
+""")
+
+ARTIST_DETAIL_JSON = _document_bytes(ARTIST_DETAIL_DOCUMENT)
+
+@cached(maxsize=1024)
 def get_artist_detail(artist_id: int):
-    sql = text("""
-        SELECT
-          a.id                AS artist_id,
-          a.name              AS artist_name,
-          a.spotify_artist_id AS spotify_artist_id,
-
-          s.id                AS song_id,
-          s.title             AS song_title,
-          s.spotify_track_id  AS spotify_track_id,
-
-          v.id                AS video_id,
-          v.title             AS video_title,
-          v.youtube_video_id  AS youtube_video_id
-
-        FROM artists a
-        LEFT JOIN song_artists sa ON sa.artist_id = a.id
-        LEFT JOIN songs s         ON s.id = sa.song_id
-        LEFT JOIN video_songs vs  ON vs.song_id = s.id
-        LEFT JOIN videos v        ON v.id = vs.video_id
-
-        WHERE a.id = :artist_id
-        ORDER BY s.title, v.title
-    """)
-
-    with engine.connect() as conn:
-        rows = conn.execute(
-            sql,
+    with connect() as conn:
+        return conn.execute(
+            ARTIST_DETAIL_DOCUMENT,
             {"artist_id": artist_id}
-        ).mappings().all()
-
-    if not rows:
-        return None
-
-    artist = {
-        "id": rows[0]["artist_id"],
-        "name": rows[0]["artist_name"],
-        "spotify_artist_id": rows[0]["spotify_artist_id"],
-        "songs": {}
-    }
-
-    for row in rows:
-        if row["song_id"] is None:
-            continue
-
-        song = artist["songs"].setdefault(
-            row["song_id"],
-            {
-                "id": row["song_id"],
-                "title": row["song_title"],
-                "spotify_track_id": row["spotify_track_id"],
-                "videos": []
-            }
-        )
+        ).scalar_one_or_none()
 
-        if row["video_id"]:
-            song["videos"].append({
-                "title": row["video_title"],
-                "youtube_video_id": row["youtube_video_id"]
-            })
-
-    # Convert songs dict → list
-    artist["songs"] = list(artist["songs"].values())
-
-    return artist
+@cached(maxsize=1024)
+def get_artist_detail_json(artist_id: int):
+    with connect() as conn:
+        return conn.execute(
+            ARTIST_DETAIL_JSON,
+            {"artist_id": artist_id}
+        ).scalar_one_or_none()
 
+@cached(maxsize=1)
 def list_video_categories():
     sql = text("""
       SELECT slug, title, description
@@ -1621,9 +2054,10 @@ def list_video_categories():
       WHERE is_active = true
       ORDER BY sort_order, title
     """)
-    with engine.connect() as conn:
+    with connect() as conn:
         return conn.execute(sql).mappings().all()
 
+@cached(maxsize=64)
 def get_video_category_by_slug(slug: str):
     sql = text("""
       SELECT id, slug, title, description
@@ -1631,90 +2065,200 @@ def get_video_category_by_slug(slug: str):
       WHERE slug = :slug AND is_active = true
       LIMIT 1
     """)
-    with engine.connect() as conn:
+    with connect() as conn:
         return conn.execute(sql, {"slug": slug}).mappings().first()
 
-def search_videos(query: str, limit: int = 50):
-    sql = text("""
-        SELECT
-            v.id,
-            v.title,
-            v.published_at,
-            COUNT(vs.song_id) AS song_count
-        FROM videos v
-        LEFT JOIN video_songs vs
-            ON vs.video_id = v.id
-        WHERE unaccent(lower(v.title))
-              LIKE unaccent(lower(:q))
-        GROUP BY v.id
-        ORDER BY v.published_at DESC
-        LIMIT :limit
-    """)
+# Keyset cursors: an opaque token for the boundary row's
+# (published_at, id), so the next page starts with an index range
+# instead of skipping rows.
+
+def encode_cursor(published_at, key: int) -> str:
+    raw = f"{published_at.isoformat() if published_at else ''}|{key}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        published_at, _, key = raw.partition("|")
+
+        if not published_at:
+            return None, int(key)
+        if len(published_at) == 10:
+            return date.fromisoformat(published_at), int(key)
+        return datetime.fromisoformat(published_at), int(key)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"invalid cursor {token!r}")
+
+# The /videos listing pages by keyset on (published_at, id), newest
+# first with undated videos first, as the old ORDER BY published_at DESC
+# had them. Every page is an index range scan no matter how deep it is
+# (see migrations/003).
+
+def get_videos_page(
+    limit: int = 50,
+    after: str | None = None,
+    before: str | None = None
+):
+    backward = before is not None
+    cursor = before if backward else after
+
+    op = ">" if backward else "<"
+    direction = "ASC" if backward else "DESC"
+
+    dated = ["v.published_at IS NOT NULL"]
+    undated = ["v.published_at IS NULL"]
+    params = {"limit": limit + 1}
+
+    # Forward order is undated then dated (newest first); a cursor in one
+    # part rules out the part before it.
+    use_dated = use_undated = True
+
+    if cursor is not None:
+        published_at, video_id = decode_cursor(cursor)
+        params["cursor_id"] = video_id
+
+        if published_at is None:
+            undated.append(f"v.id {op} :cursor_id")
+            use_dated = not backward
+        else:
+            dated.append(
+                f"(v.published_at, v.id) {op} (:cursor_published_at, :cursor_id)"
+            )
+            params["cursor_published_at"] = published_at
+            use_undated = backward
 
-    with engine.connect() as conn:
-        rows = conn.execute(
-            sql,
-            {
-                "q": f"%{query}%",
-                "limit": limit
-            }
-        ).mappings().all()
+    # =========================
+    # 1️⃣ One index-ordered branch per part
+    # =========================
+    branches = []
 
-    return [dict(row) for row in rows]
+    if use_dated:
+        branches.append(f"""
+            SELECT v.id, v.title, v.published_at, v.song_count
+            FROM videos v
+            WHERE {" AND ".join(dated)}
+            ORDER BY v.published_at {direction}, v.id {direction}
+            LIMIT :limit
+        """)
+
+    if use_undated:
+        branches.append(f"""
+            SELECT v.id, v.title, v.published_at, v.song_count
+            FROM videos v
+            WHERE {" AND ".join(undated)}
+            ORDER BY v.id {direction}
+            LIMIT :limit
+        """)
 
-def get_videos(limit: int = 50, offset: int = 0):
-    sql = text("""
+    nulls = "LAST" if backward else "FIRST"
+
+    sql = text(f"""
+        WITH page AS (
+            {" UNION ALL ".join(f"({branch})" for branch in branches)}
+        )
         SELECT
-            v.id,
-            v.title,
-            v.published_at,
-            COUNT(vs.song_id) AS song_count
-        FROM videos v
-        LEFT JOIN video_songs vs
-            ON vs.video_id = v.id
-        GROUP BY v.id
-        ORDER BY v.published_at DESC
+            p.id,
+            p.title,
+            p.published_at,
+            p.song_count
+        FROM page p
+        ORDER BY p.published_at {direction} NULLS {nulls}, p.id {direction}
         LIMIT :limit
-        OFFSET :offset
     """)
 
-    with engine.connect() as conn:
-        rows = conn.execute(
-            sql,
-            {
-                "limit": limit,
-                "offset": offset
-            }
-        ).mappings().all()
+    with connect() as conn:
+        rows = [dict(row) for row in conn.execute(sql, params).mappings().all()]
 
-    return [dict(row) for row in rows]
+    # =========================
+    # 2️⃣ Trim the look-ahead row and build cursors
+    # =========================
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if backward:
+        rows.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = after is not None, has_more
+
+    return {
+        "videos": rows,
+        "prev": (
+            encode_cursor(rows[0]["published_at"], rows[0]["id"])
+            if rows and has_newer else None
+        ),
+        "next": (
+            encode_cursor(rows[-1]["published_at"], rows[-1]["id"])
+            if rows and has_older else None
+        ),
+    }
 
 
+@cached(maxsize=1)
 def get_video_count():
     sql = text("""
         SELECT COUNT(*)
         FROM videos
     """)
 
-    with engine.connect() as conn:
+    with connect() as conn:
         return conn.execute(sql).scalar_one()
 
+# =========================
+# Song count consistency
+# =========================
+
+def check_song_counts(repair: bool = False):
+    # videos.song_count and artists.song_count are kept by triggers
+    # (migrations/005). This reports rows whose counter disagrees with
+    # the link tables and, with repair=True, rebuilds them in bulk.
+    drift_sql = text("""
+        SELECT
+            (
+                SELECT COUNT(*)
+                FROM videos v
+                WHERE v.song_count <> (
+                    SELECT COUNT(DISTINCT vs.song_id)
+                    FROM video_songs vs
+                    WHERE vs.video_id = v.id
+                )
+            ) AS videos,
+            (
+                SELECT COUNT(*)
+                FROM artists a
+                WHERE a.song_count <> (
+                    SELECT COUNT(DISTINCT sa.song_id)
+                    FROM song_artists sa
+                    WHERE sa.artist_id = a.id
+                )
+            ) AS artists
+    """)
+
+    with connect() as conn:
+        if not repair:
+            return {"drift": dict(conn.execute(drift_sql).mappings().one())}
+
+        fixed = dict(
+            conn.execute(text("SELECT * FROM refresh_song_counts()")).all()
+        )
+        conn.commit()
+
+    return {"fixed": fixed}
+
 def list_videos_for_category(category_id: int, q: str | None = None):
     sql = text("""
         SELECT
           v.id,
           v.title,
           v.published_at,
-          COUNT(DISTINCT vs.song_id) AS song_count
+          v.song_count
         FROM video_category_videos vcv
         JOIN videos v ON v.id = vcv.video_id
-        LEFT JOIN video_songs vs ON vs.video_id = v.id
         WHERE vcv.category_id = :category_id
           AND (
             CAST(:q AS text) IS NULL
             OR v.title ILIKE '%' || :q || '%'
           )
-        GROUP BY v.id, vcv.rank
         ORDER BY
           vcv.rank NULLS LAST,
           v.published_at DESC NULLS LAST,
@@ -1726,11 +2270,14 @@ def list_videos_for_category(category_id: int, q: str | None = None):
         "q": q.strip() if q and q.strip() else None
     }
 
-    with engine.connect() as conn:
+    with connect() as conn:
         return conn.execute(sql, params).mappings().all()
 
 
+@cached(maxsize=128)
 def get_player_by_slug(slug: str):
+    # Battle totals come from the player_stats projection
+    # (migrations/006), so this is a pair of primary-key lookups.
     sql = text("""
         SELECT
             p.id,
@@ -1744,81 +2291,20 @@ def get_player_by_slug(slug: str):
             p.accent_color,
             p.slug,
 
-            (
-                SELECT COUNT(DISTINCT bp.battle_id)
-                FROM battle_players bp
-                WHERE bp.player_id = p.id
-            ) AS total_battles,
-
-            (
-                SELECT COUNT(DISTINCT b.id)
-                FROM battles b
-
-                LEFT JOIN battle_teams bt
-                    ON bt.battle_id = b.id
-                   AND b.winner ILIKE '%' || bt.name || '%'
-
-                LEFT JOIN battle_team_members btm
-                    ON btm.team_id = bt.id
-
-                LEFT JOIN battle_players bp
-                    ON bp.id = btm.battle_player_id
-
-                WHERE
-                    (
-                        bp.player_id = p.id
-                    )
-                    OR
-                    (
-                        bt.id IS NULL
-                        AND b.winner ILIKE '%' || p.name || '%'
-                    )
-            ) AS total_wins,
-
-            ROUND(
-                (
-                    (
-                        SELECT COUNT(DISTINCT b.id)
-                        FROM battles b
-
-                        LEFT JOIN battle_teams bt
-                            ON bt.battle_id = b.id
-                           AND b.winner ILIKE '%' || bt.name || '%'
-
-                        LEFT JOIN battle_team_members btm
-                            ON btm.team_id = bt.id
-
-                        LEFT JOIN battle_players bp
-                            ON bp.id = btm.battle_player_id
-
-                        WHERE
-                            (
-                                bp.player_id = p.id
-                            )
-                            OR
-                            (
-                                bt.id IS NULL
-                                AND b.winner ILIKE '%' || p.name || '%'
-                            )
-                    ) * 100.0
-                ) /
-                NULLIF(
-                    (
-                        SELECT COUNT(DISTINCT bp.battle_id)
-                        FROM battle_players bp
-                        WHERE bp.player_id = p.id
-                    ),
-                    0
-                ),
-                1
-            ) AS win_rate
+            COALESCE(ps.battles, 0)     AS total_battles,
+            COALESCE(ps.wins, 0)        AS total_wins,
+            ps.win_rate,
+            COALESCE(ps.appearances, 0) AS appearances,
+            COALESCE(ps.round_types, '{}'::jsonb) AS round_types
 
         FROM players p
+        LEFT JOIN player_stats ps
+            ON ps.player_id = p.id
         WHERE p.slug = :slug
         LIMIT 1
     """)
 
-    with engine.connect() as conn:
+    with connect() as conn:
         row = conn.execute(
             sql,
             {"slug": slug}
@@ -1827,11 +2313,121 @@ def get_player_by_slug(slug: str):
     if not row:
         return None
 
-    return dict(row)
+    player = dict(row)
+
+    player["round_types"] = [
+        {"round_type": round_type, **totals}
+        for round_type, totals in sorted(player["round_types"].items())
+    ]
+
+    return player
+
+@cached(maxsize=256)
+def get_player_battles(player_id: int, limit: int = 20, after: str | None = None):
+    # Newest first by (published_at, battle id), undated battles last.
+    # battle_players carries its video's published_at (migrations/009),
+    # so the page is read from one index: a range of dated rows and,
+    # once those run out, a range of undated ones, each reading at most
+    # `limit` entries however long the history is. Placements are then
+    # resolved through battle_player_results for the page's rows only.
+    dated = ["bp.player_id = :player_id", "bp.published_at IS NOT NULL"]
+    undated = ["bp.player_id = :player_id", "bp.published_at IS NULL"]
+    params = {"player_id": player_id, "limit": limit + 1}
+    use_dated = True
+
+    if after is not None:
+        published_at, battle_id = decode_cursor(after)
+        params["cursor_id"] = battle_id
+
+        if published_at is None:
+            undated.append("bp.battle_id < :cursor_id")
+            use_dated = False
+        else:
+            dated.append(
+                "(bp.published_at, bp.battle_id) < (:cursor_published_at, :cursor_id)"
+            )
+            params["cursor_published_at"] = published_at
+
+    branches = [
+        f"""
+            SELECT bp.id, bp.battle_id, bp.published_at
+            FROM battle_players bp
+            WHERE {" AND ".join(conditions)}
+            ORDER BY bp.published_at DESC NULLS LAST, bp.battle_id DESC
+            LIMIT :limit
+        """
+        for conditions in ([dated] if use_dated else []) + [undated]
+    ]
+
+    sql = text(f"""
+        WITH page AS (
+            SELECT *
+            FROM ({" UNION ALL ".join(f"({branch})" for branch in branches)}) x
+            ORDER BY x.published_at DESC NULLS LAST, x.battle_id DESC
+            LIMIT :limit
+        )
+        SELECT
+            page.battle_id,
+            v.id AS video_id,
+            v.title,
+            v.youtube_video_id,
+            page.published_at,
+            bt.name AS team_name,
+            r.is_guest,
+            r.final_placement AS placement,
+            r.won
+        FROM page
+        JOIN battles b
+            ON b.id = page.battle_id
+        JOIN videos v
+            ON v.id = b.video_id
+        JOIN battle_player_results r
+            ON r.battle_player_id = page.id
+        LEFT JOIN battle_teams bt
+            ON bt.id = r.team_id
+        ORDER BY page.published_at DESC NULLS LAST, page.battle_id DESC
+    """)
+
+    with connect() as conn:
+        rows = [dict(row) for row in conn.execute(sql, params).mappings().all()]
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
-def list_players():
+    return {
+        "battles": rows,
+        "next": (
+            encode_cursor(rows[-1]["published_at"], rows[-1]["battle_id"])
+            if has_more else None
+        ),
+    }
+
+@cached(maxsize=256)
+def get_head_to_head(slug_a: str, slug_b: str):
+    # Reads the precomputed pair row (migrations/008); pairs are stored
+    # once with the lower player id first, so flip it when needed.
     sql = text("""
         SELECT
+            pa.id   AS a_id,
+            pb.id   AS b_id,
+            h.shared_battles,
+            h.a_wins,
+            h.b_wins,
+            h.matches,
+            h.a_match_wins,
+            h.b_match_wins
+        FROM players pa
+        JOIN players pb
+            ON pb.slug = :slug_b
+        LEFT JOIN player_head_to_head h
+            ON h.player_a = LEAST(pa.id, pb.id)
+           AND h.player_b = GREATEST(pa.id, pb.id)
+        WHERE pa.slug = :slug_a
+    """)
+
+    players_sql = text("""
+        SELECT
+            id,
             name,
             full_name,
             nickname,
@@ -1839,18 +2435,93 @@ def list_players():
             accent_color,
             image_url
         FROM players
-        WHERE slug IS NOT NULL
-        ORDER BY id
-        LIMIT 5
+        WHERE slug = ANY(:slugs)
     """)
 
-    with engine.connect() as conn:
+    with connect() as conn:
+        row = conn.execute(
+            sql,
+            {"slug_a": slug_a, "slug_b": slug_b}
+        ).mappings().first()
+
+        if not row:
+            return None
+
+        players = {
+            p["slug"]: dict(p)
+            for p in conn.execute(
+                players_sql,
+                {"slugs": [slug_a, slug_b]}
+            ).mappings().all()
+        }
+
+    flipped = row["a_id"] > row["b_id"]
+    wins = (row["a_wins"] or 0, row["b_wins"] or 0)
+    match_wins = (row["a_match_wins"] or 0, row["b_match_wins"] or 0)
+
+    if flipped:
+        wins, match_wins = wins[::-1], match_wins[::-1]
+
+    shared = row["shared_battles"] or 0
+
+    return {
+        "a": players[slug_a],
+        "b": players[slug_b],
+        "shared_battles": shared,
+        "wins": {"a": wins[0], "b": wins[1]},
+        "draws": shared - wins[0] - wins[1],
+        "matches": row["matches"] or 0,
+        "match_wins": {"a": match_wins[0], "b": match_wins[1]},
+    }
+
+# Sortable columns for list_players(); name and player id break ties.
+PLAYER_SORTS = {
+    "name": "LOWER(p.name)",
+    "battles": "battles",
+    "wins": "wins",
+    "win_rate": "ps.win_rate",
+    "appearances": "appearances",
+}
+
+@cached(maxsize=2 * len(PLAYER_SORTS))
+def list_players(sort: str = "name", descending: bool = False):
+    # Every player, guests included, with totals from player_stats
+    # (migrations/006): one join, no per-player queries.
+    direction = "DESC" if descending else "ASC"
+
+    sql = text(f"""
+        SELECT
+            p.id,
+            p.name,
+            p.full_name,
+            p.nickname,
+            p.slug,
+            p.hometown,
+            p.accent_color,
+            p.image_url,
+            COALESCE(ps.battles, 0)       AS battles,
+            COALESCE(ps.wins, 0)          AS wins,
+            ps.win_rate,
+            COALESCE(ps.appearances, 0)   AS appearances,
+            COALESCE(ps.guest_battles, 0) AS guest_battles,
+            COALESCE(ps.battles > 0 AND ps.guest_battles = ps.battles, false)
+                AS is_guest
+        FROM players p
+        LEFT JOIN player_stats ps
+            ON ps.player_id = p.id
+        ORDER BY
+            {PLAYER_SORTS[sort]} {direction} NULLS LAST,
+            LOWER(p.name),
+            p.id
+    """)
+
+    with connect() as conn:
         rows = conn.execute(sql).mappings().all()
 
     return [dict(r) for r in rows]
 
 def get_video_id_by_youtube_id(youtube_video_id: str):
-    with engine.connect() as conn:
+    with connect() as conn:
         return conn.execute(
             text("""
                 SELECT id
@@ -1860,4 +2531,54 @@ def get_video_id_by_youtube_id(youtube_video_id: str):
             {
                 "youtube_video_id": youtube_video_id
             }
-        ).scalar_one_or_none()
\ No newline at end of file
+        ).scalar_one_or_none()
+
+def get_video_section_kinds():
+    sql = text("""
+        SELECT 'battle' AS kind, video_id FROM battles
+        UNION ALL
+        SELECT 'overtime', video_id FROM overtime_episodes
+        UNION ALL
+        SELECT 'bucket_list', video_id FROM bucket_list_episodes
+        UNION ALL
+        SELECT 'stereotypes', video_id FROM stereotypes_episodes
+    """)
+
+    with connect() as conn:
+        rows = conn.execute(sql).mappings().all()
+
+    return [dict(row) for row in rows]
+
+def get_search_entries(after: dict | None = None):
+    # Every searchable name, optionally only rows with ids above the
+    # per-kind high-water marks in `after` (for incremental refreshes).
+    after = after or {}
+
+    sql = text("""
+        SELECT 'song' AS kind, id, title AS label, id::text AS key
+        FROM songs
+        WHERE id > :song
+        UNION ALL
+        SELECT 'artist', id, name, id::text
+        FROM artists
+        WHERE id > :artist
+        UNION ALL
+        SELECT 'video', id, title, id::text
+        FROM videos
+        WHERE id > :video
+        UNION ALL
+        SELECT 'player', id, name, slug
+        FROM players
+        WHERE slug IS NOT NULL
+          AND id > :player
+    """)
+
+    params = {
+        kind: after.get(kind, 0)
+        for kind in ("song", "artist", "video", "player")
+    }
+
+    with connect() as conn:
+        rows = conn.execute(sql, params).mappings().all()
+
+    return [dict(row) for row in rows]
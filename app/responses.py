@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import orjson
+from starlette.responses import Response
+
+from . import cache
+
+
+# =========================
+# JSON responses
+# =========================
+#
+# The hot /api endpoints return a Response themselves, which skips
+# FastAPI's response validation and jsonable_encoder. The body is either
+# JSON Postgres already produced (RawJSONResponse, passed through as
+# bytes) or a query result encoded by orjson. Cached results are
+# FrozenDicts and tuples, which orjson writes as objects and arrays;
+# _default covers the types it doesn't know.
+#
+# json_payload() keeps the encoded bytes in a cache namespace, so a
+# repeat request is one cache lookup and a socket write.
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class RawJSONResponse(Response):
+    # Content must already be JSON bytes.
+    media_type = "application/json"
+
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def json_payload(ns: cache.CacheNamespace, key, load):
+    # Encoded load() result for key, or None when load() found nothing.
+    payload = ns.get(key)
+
+    if payload is cache.MISSING:
+        def encode():
+            content = load()
+            return None if content is None else dumps(content)
+
+        payload = ns.load(key, encode)
+
+    return payload
@@ -1,70 +1,338 @@
-from fastapi import APIRouter, Response
+import hashlib
+import os
+import zlib
+from datetime import datetime, time, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import APIRouter, HTTPException, Request, Response
 from sqlalchemy import text
-from .db import engine
+from . import cache
+from .db import connect
 from .queries import list_video_categories
 
 router = APIRouter(include_in_schema=False)
 
 BASE_URL = "https://dudeperfectfanarchive.com"
 
+# /sitemap.xml is a sitemap index. Entity URLs live in gzipped shards
+# (/sitemaps/videos-1.xml.gz, ...), each covering a fixed id range so a
+# row never moves between shards and crawlers only refetch the shards
+# whose ETag changed. The protocol caps a sitemap at 50,000 URLs.
+SITEMAP_SHARD_SIZE = int(os.getenv("SITEMAP_SHARD_SIZE", "50000"))
+
+# Rows are read through server-side cursors in batches of this size and
+# written out in chunks of this many URLs, so memory stays flat however
+# big a shard gets.
+SITEMAP_FETCH_SIZE = 1000
+SITEMAP_CHUNK_URLS = 500
+
+SITEMAP_TTL = float(os.getenv("SITEMAP_TTL", "3600"))
+
+SITEMAP_FILES = cache.namespace("sitemap", ttl=SITEMAP_TTL, maxsize=256)
+
+STATIC_PATHS = [
+    "/",
+    "/videos",
+    "/songs",
+    "/artists",
+    "/videos/categories",
+    "/players",
+    "/contact",
+]
+
+# Each entity lists its URLs for one id range, and its shards with their
+# newest lastmod. Songs, artists and players take lastmod from the latest
+# video they appear in.
+ENTITIES = {
+    # --- Videos ---
+    "videos": {
+        "path": "/videos/{}",
+        "urls": """
+            SELECT v.id AS key, v.published_at AS lastmod
+            FROM videos v
+            WHERE v.id > :lo AND v.id <= :hi
+            ORDER BY v.id
+        """,
+        "shards": """
+            SELECT (v.id - 1) / :size + 1 AS shard, MAX(v.published_at) AS lastmod
+            FROM videos v
+            GROUP BY 1
+            ORDER BY 1
+        """,
+    },
+    # --- Songs ---
+    "songs": {
+        "path": "/songs/{}",
+        "urls": """
+            SELECT s.id AS key, MAX(v.published_at) AS lastmod
+            FROM songs s
+            LEFT JOIN video_songs vs ON vs.song_id = s.id
+            LEFT JOIN videos v       ON v.id = vs.video_id
+            WHERE s.id > :lo AND s.id <= :hi
+            GROUP BY s.id
+            ORDER BY s.id
+        """,
+        "shards": """
+            SELECT (s.id - 1) / :size + 1 AS shard, MAX(v.published_at) AS lastmod
+            FROM songs s
+            LEFT JOIN video_songs vs ON vs.song_id = s.id
+            LEFT JOIN videos v       ON v.id = vs.video_id
+            GROUP BY 1
+            ORDER BY 1
+        """,
+    },
+    # --- Artists ---
+    "artists": {
+        "path": "/artists/{}",
+        "urls": """
+            SELECT a.id AS key, MAX(v.published_at) AS lastmod
+            FROM artists a
+            LEFT JOIN song_artists sa ON sa.artist_id = a.id
+            LEFT JOIN video_songs vs  ON vs.song_id = sa.song_id
+            LEFT JOIN videos v        ON v.id = vs.video_id
+            WHERE a.id > :lo AND a.id <= :hi
+            GROUP BY a.id
+            ORDER BY a.id
+        """,
+        "shards": """
+            SELECT (a.id - 1) / :size + 1 AS shard, MAX(v.published_at) AS lastmod
+            FROM artists a
+            LEFT JOIN song_artists sa ON sa.artist_id = a.id
+            LEFT JOIN video_songs vs  ON vs.song_id = sa.song_id
+            LEFT JOIN videos v        ON v.id = vs.video_id
+            GROUP BY 1
+            ORDER BY 1
+        """,
+    },
+    # --- Players ---
+    "players": {
+        "path": "/player/{}",
+        "urls": """
+            SELECT p.slug AS key, MAX(v.published_at) AS lastmod
+            FROM players p
+            LEFT JOIN battle_players bp ON bp.player_id = p.id
+            LEFT JOIN battles b         ON b.id = bp.battle_id
+            LEFT JOIN videos v          ON v.id = b.video_id
+            WHERE p.slug IS NOT NULL
+              AND p.id > :lo AND p.id <= :hi
+            GROUP BY p.id, p.slug
+            ORDER BY p.id
+        """,
+        "shards": """
+            SELECT (p.id - 1) / :size + 1 AS shard, MAX(v.published_at) AS lastmod
+            FROM players p
+            LEFT JOIN battle_players bp ON bp.player_id = p.id
+            LEFT JOIN battles b         ON b.id = bp.battle_id
+            LEFT JOIN videos v          ON v.id = b.video_id
+            WHERE p.slug IS NOT NULL
+            GROUP BY 1
+            ORDER BY 1
+        """,
+    },
+}
+
+
+# =========================
+# Routes
+# =========================
 
 @router.get("/sitemap.xml")
-def sitemap():
-    urls: list[str] = []
-
-    # --- Static pages ---
-    urls.extend([
-        f"{BASE_URL}/",
-        f"{BASE_URL}/videos",
-        f"{BASE_URL}/songs",
-        f"{BASE_URL}/artists",
-        f"{BASE_URL}/videos/categories",
-        f"{BASE_URL}/players",
-        f"{BASE_URL}/contact",
-    ])
-
-    # --- Category pages (DB-backed slugs) ---
-    categories = list_video_categories()
-    for cat in categories:
-        urls.append(f"{BASE_URL}/videos/categories/{cat['slug']}")
-
-    with engine.connect() as conn:
-        # --- Videos ---
-        for row in conn.execute(text("SELECT id FROM videos")):
-            urls.append(f"{BASE_URL}/videos/{row.id}")
-
-        # --- Songs ---
-        for row in conn.execute(text("SELECT id FROM songs")):
-            urls.append(f"{BASE_URL}/songs/{row.id}")
-
-        # --- Artists ---
-        for row in conn.execute(text("SELECT id FROM artists")):
-            urls.append(f"{BASE_URL}/artists/{row.id}")
-    
-        # --- Players ---
-        for row in conn.execute(text("""
-            SELECT slug
-            FROM players
-            WHERE slug IS NOT NULL
-        """)):
-            urls.append(f"{BASE_URL}/player/{row.slug}")
-
-    return Response(
-        content=render_sitemap(urls),
-        media_type="application/xml"
+def sitemap(request: Request):
+    body, etag, lastmod = _cached_file("index", build_sitemap_index)
+    return _conditional_response(
+        request, body, etag, lastmod, "application/xml"
+    )
+
+
+@router.get("/sitemaps/{name}.xml.gz")
+def sitemap_shard(request: Request, name: str):
+    if name == "pages":
+        builder = build_pages_shard
+    else:
+        entity, _, shard = name.rpartition("-")
+        if entity not in ENTITIES or not shard.isdigit() or int(shard) < 1:
+            raise HTTPException(404)
+        builder = lambda: build_entity_shard(entity, int(shard))
+
+    body, etag, lastmod = _cached_file(name, builder)
+    return _conditional_response(
+        request, body, etag, lastmod, "application/gzip"
+    )
+
+
+# =========================
+# Builders
+# =========================
+
+def build_sitemap_index():
+    entries = [(f"{BASE_URL}/sitemaps/pages.xml.gz", None)]
+    newest = None
+
+    with connect() as conn:
+        for entity, spec in ENTITIES.items():
+            rows = conn.execute(
+                text(spec["shards"]),
+                {"size": SITEMAP_SHARD_SIZE}
+            ).mappings().all()
+
+            for row in rows:
+                entries.append((
+                    f"{BASE_URL}/sitemaps/{entity}-{row['shard']}.xml.gz",
+                    row["lastmod"],
+                ))
+                newest = _newest(newest, row["lastmod"])
+
+    body = "".join(iter_sitemap(entries, root="sitemapindex")).encode()
+    return body, newest
+
+
+def build_pages_shard():
+    def entries():
+        # --- Static pages ---
+        for path in STATIC_PATHS:
+            yield f"{BASE_URL}{path}", None
+
+        # --- Category pages (DB-backed slugs) ---
+        for cat in list_video_categories():
+            yield f"{BASE_URL}/videos/categories/{cat['slug']}", None
+
+    return _gzip(iter_sitemap(entries())), None
+
+
+def build_entity_shard(entity: str, shard: int):
+    spec = ENTITIES[entity]
+    newest = None
+    count = 0
+
+    def entries():
+        nonlocal newest, count
+
+        with connect() as conn:
+            stmt = text(spec["urls"]).execution_options(
+                stream_results=True,
+                yield_per=SITEMAP_FETCH_SIZE,
+            )
+            rows = conn.execute(stmt, {
+                "lo": (shard - 1) * SITEMAP_SHARD_SIZE,
+                "hi": shard * SITEMAP_SHARD_SIZE,
+            })
+
+            for row in rows:
+                count += 1
+                newest = _newest(newest, row.lastmod)
+                yield BASE_URL + spec["path"].format(row.key), row.lastmod
+
+    body = _gzip(iter_sitemap(entries()))
+
+    # An id range with no rows left is gone, not an empty sitemap.
+    if not count:
+        raise HTTPException(404)
+
+    return body, newest
+
+
+def iter_sitemap(entries, root: str = "urlset"):
+    # Streams (loc, lastmod) entries as a urlset or sitemapindex
+    # document; lastmod is written only when there is one.
+    tag = "url" if root == "urlset" else "sitemap"
+
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<{root} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
     )
 
+    chunk = []
+
+    for loc, lastmod in entries:
+        chunk.append(f"\n  <{tag}>\n    <loc>{loc}</loc>")
+        if lastmod is not None:
+            chunk.append(f"\n    <lastmod>{_w3c_date(lastmod)}</lastmod>")
+        chunk.append(f"\n  </{tag}>")
+
+        if len(chunk) >= SITEMAP_CHUNK_URLS:
+            yield "".join(chunk)
+            chunk.clear()
+
+    if chunk:
+        yield "".join(chunk)
+
+    yield f"\n</{root}>"
+
+
+# =========================
+# Helpers
+# =========================
+
+def _gzip(chunks) -> bytes:
+    # wbits=31 writes a gzip container with a zeroed mtime, so the same
+    # content always compresses to the same bytes (and the same ETag).
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    parts = [compressor.compress(chunk.encode()) for chunk in chunks]
+    parts.append(compressor.flush())
+    return b"".join(parts)
+
+
+def _cached_file(name: str, builder):
+    entry = SITEMAP_FILES.get(name)
+
+    if entry is cache.MISSING:
+        def build():
+            body, lastmod = builder()
+            etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+            return body, etag, _as_date(lastmod)
+
+        entry = SITEMAP_FILES.load(name, build)
+
+    return entry
+
+
+def _conditional_response(request: Request, body, etag, lastmod, media_type):
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=3600",
+    }
+
+    last_modified = None
+    if lastmod is not None:
+        last_modified = datetime.combine(lastmod, time.min, timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _not_modified(request: Request, etag: str, last_modified) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
 
-def render_sitemap(urls: list[str]) -> str:
-    lines = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
-    ]
+def _w3c_date(value) -> str:
+    return _as_date(value).isoformat()
 
-    for url in urls:
-        lines.append("  <url>")
-        lines.append(f"    <loc>{url}</loc>")
-        lines.append("  </url>")
 
-    lines.append("</urlset>")
-    return "\n".join(lines)
+def _newest(current, value):
+    value = _as_date(value)
+    if value is None:
+        return current
+    if current is None or value > current:
+        return value
+    return current
@@ -0,0 +1,125 @@
+from collections import Counter
+
+from .autocomplete import index as autocomplete_index, normalize
+
+
+# =========================
+# "Did you mean" suggestions
+# =========================
+#
+# When a song or artist search comes back empty (usually a misspelling)
+# we suggest close names from memory instead of running more scans.
+# Names are indexed by padded trigrams; a lookup counts shared trigrams
+# to pick a few candidates, then verifies them with a Levenshtein
+# distance that gives up as soon as it exceeds the allowed edit budget.
+# The index is rebuilt from the autocomplete entries whenever that index
+# refreshes.
+
+SUGGEST_KINDS = ("song", "artist")
+
+# Candidates (by trigram overlap) verified per lookup.
+MAX_CANDIDATES = 64
+
+
+def _trigrams(value: str) -> set:
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_edits(query: str) -> int:
+    return min(3, max(1, len(query) // 4))
+
+
+def bounded_levenshtein(a: str, b: str, limit: int):
+    # Classic two-row DP that stops once every cell in a row exceeds
+    # `limit`; returns None when the distance is over the limit.
+    if abs(len(a) - len(b)) > limit:
+        return None
+
+    previous = list(range(len(b) + 1))
+
+    for i, ca in enumerate(a, 1):
+        current = [i]
+
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+
+        if min(current) > limit:
+            return None
+        previous = current
+
+    return previous[-1] if previous[-1] <= limit else None
+
+
+class _KindIndex:
+    __slots__ = ("entries", "names", "postings")
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.names = tuple(normalize(e["label"]) for e in entries)
+        self.postings = {}
+
+        for idx, name in enumerate(self.names):
+            for gram in _trigrams(name):
+                self.postings.setdefault(gram, []).append(idx)
+
+
+class SuggestionIndex:
+    def __init__(self):
+        self._kinds = {}
+
+    def rebuild(self, entries):
+        # Postings are kept per kind, so a crowd of similar song titles
+        # can't take every candidate slot of an artist lookup. The new
+        # build is swapped in as one reference; readers never see half
+        # of it.
+        self._kinds = {
+            kind: _KindIndex(tuple(e for e in entries if e["kind"] == kind))
+            for kind in SUGGEST_KINDS
+        }
+
+    def suggest(self, query: str, kind: str, limit: int = 5):
+        kind_index = self._kinds.get(kind)
+        term = normalize(query)
+        if kind_index is None or not term:
+            return []
+
+        entries, names = kind_index.entries, kind_index.names
+
+        overlap = Counter()
+        for gram in _trigrams(term):
+            overlap.update(kind_index.postings.get(gram, ()))
+
+        limit_edits = max_edits(term)
+        ranked = []
+
+        for idx, shared in overlap.most_common(MAX_CANDIDATES):
+            name = names[idx]
+            distance = bounded_levenshtein(term, name, limit_edits)
+
+            # Also accept a typo in the start of a longer name
+            # ("imagin drag" -> "Imagine Dragons").
+            if distance is None and len(name) > len(term):
+                distance = bounded_levenshtein(
+                    term, name[:len(term) + 1], limit_edits
+                )
+                if distance is not None:
+                    distance += 1
+
+            # Distance 0 is kept (and ranks first): the search compares
+            # raw text, so "ac dc" misses "AC/DC" even though the
+            # normalized names are equal.
+            if distance is not None:
+                ranked.append((distance, -shared, len(name), idx))
+
+        ranked.sort()
+        return [entries[idx] for *_, idx in ranked[:limit]]
+
+
+index = SuggestionIndex()
+
+autocomplete_index.on_rebuild(index.rebuild)
@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+from collections import defaultdict
+
+from . import cache, queries
+
+
+# =========================
+# Video kind index
+# =========================
+#
+# Maps video id -> the section kinds ("battle", "overtime", "bucket_list",
+# "stereotypes") that have rows for it, so the video detail page only
+# runs the loaders that can return something. The whole map is a few
+# integers per episode; it is rebuilt from one query when it is older
+# than VIDEO_KINDS_TTL seconds, after invalidate(), or when the query
+# cache generation moves (an admin invalidation in any worker), and
+# swapped in atomically so readers never see a half-built map.
+#
+# The generation lives in Redis with a shared backend, so lookups check
+# it at most every VIDEO_KINDS_GENERATION_CHECK seconds, and a failed
+# check (-1) keeps the current map rather than reloading it.
+
+VIDEO_KINDS_TTL = float(os.getenv("VIDEO_KINDS_TTL", "300"))
+VIDEO_KINDS_GENERATION_CHECK = float(
+    os.getenv("VIDEO_KINDS_GENERATION_CHECK", str(cache.CACHE_GENERATION_TTL))
+)
+
+NO_KINDS = frozenset()
+
+
+class VideoKindIndex:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._kinds = None
+        self._loaded_at = 0.0
+        self._generation = None
+        self._generation_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def kinds_for(self, video_id: int) -> frozenset:
+        return self._current().get(video_id, NO_KINDS)
+
+    def refresh(self):
+        generation = cache.generation()
+        kinds = defaultdict(set)
+
+        for row in queries.get_video_section_kinds():
+            kinds[row["video_id"]].add(row["kind"])
+
+        self._kinds = {
+            video_id: frozenset(video_kinds)
+            for video_id, video_kinds in kinds.items()
+        }
+        self._loaded_at = self._generation_checked_at = time.monotonic()
+        self._generation = generation
+
+    def invalidate(self):
+        self._loaded_at = 0.0
+
+    def _generation_moved(self) -> bool:
+        now = time.monotonic()
+        if now - self._generation_checked_at < VIDEO_KINDS_GENERATION_CHECK:
+            return False
+
+        self._generation_checked_at = now
+        generation = cache.generation()
+        return generation != -1 and generation != self._generation
+
+    def _is_stale(self) -> bool:
+        return (
+            self._kinds is None
+            or time.monotonic() - self._loaded_at > self.ttl
+            or self._generation_moved()
+        )
+
+    def _current(self) -> dict:
+        if self._is_stale():
+            loaded_at = self._loaded_at
+            with self._lock:
+                # Skip the load if another thread refreshed while we
+                # waited for the lock.
+                if self._loaded_at == loaded_at:
+                    self.refresh()
+        return self._kinds
+
+
+video_kinds = VideoKindIndex(VIDEO_KINDS_TTL)
@@ -0,0 +1,102 @@
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import queries
+from .video_kinds import video_kinds
+
+
+# =========================
+# Video detail pipeline
+# =========================
+#
+# The video detail page is built from independent section loaders. By
+# default they run one after another inside the request context, so they
+# share the request-scoped connection (and its snapshot, with
+# DB_REQUEST_SNAPSHOT=1): one pool checkout per page. Set
+# VIDEO_DETAIL_PARALLEL=1 (or pass parallel=True) to run them
+# concurrently on a bounded thread pool instead; each parallel loader
+# checks out its own pooled connection, since a connection can't be
+# shared between threads, and page latency tracks the slowest section.
+#
+# Sections listed in KIND_GATED_SECTIONS only run for videos the kind
+# index says have that section; the rest are returned as None without
+# touching the database.
+
+VIDEO_DETAIL_SECTIONS = {
+    "video": queries.get_video_detail_page,
+    "battle": queries.get_battle_view,
+    "overtime": queries.get_overtime_view,
+    "bucket_list": queries.get_bucket_list_view,
+    "stereotypes": queries.get_stereotypes_view,
+}
+
+KIND_GATED_SECTIONS = {"battle", "overtime", "bucket_list", "stereotypes"}
+
+VIDEO_DETAIL_WORKERS = int(os.getenv("VIDEO_DETAIL_WORKERS", "8"))
+VIDEO_DETAIL_PARALLEL = os.getenv("VIDEO_DETAIL_PARALLEL", "") not in ("", "0")
+
+_executor = ThreadPoolExecutor(
+    max_workers=VIDEO_DETAIL_WORKERS,
+    thread_name_prefix="video-detail",
+)
+
+
+def _run_timed(loader, video_id):
+    start = time.perf_counter()
+    result = loader(video_id)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _run_serial(sections, video_id):
+    return [_run_timed(loader, video_id) for loader in sections.values()]
+
+
+async def load_video_detail(video_id: int, parallel: bool | None = None):
+    if parallel is None:
+        parallel = VIDEO_DETAIL_PARALLEL
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+
+    # The kind lookup runs alone, so it can use the request connection
+    # from the pool thread too.
+    ctx = contextvars.copy_context()
+    kinds = await loop.run_in_executor(
+        _executor, ctx.run, video_kinds.kinds_for, video_id
+    )
+    sections = {
+        name: loader
+        for name, loader in VIDEO_DETAIL_SECTIONS.items()
+        if name not in KIND_GATED_SECTIONS or name in kinds
+    }
+
+    if parallel:
+        outcomes = await asyncio.gather(*(
+            loop.run_in_executor(_executor, _run_timed, loader, video_id)
+            for loader in sections.values()
+        ))
+    else:
+        outcomes = await loop.run_in_executor(
+            _executor, ctx.run, _run_serial, sections, video_id
+        )
+
+    data = dict.fromkeys(VIDEO_DETAIL_SECTIONS)
+    timings = {}
+
+    for name, (result, elapsed_ms) in zip(sections, outcomes):
+        data[name] = result
+        timings[name] = round(elapsed_ms, 2)
+
+    timings["total"] = round((time.perf_counter() - start) * 1000, 2)
+
+    return data, timings
+
+
+def server_timing_header(timings: dict) -> str:
+    return ", ".join(
+        f"{name};dur={elapsed_ms}"
+        for name, elapsed_ms in timings.items()
+    )
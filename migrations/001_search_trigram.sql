@@ -0,0 +1,27 @@
+-- Trigram-indexed search for songs, artists and videos.
+--
+-- unaccent() is only STABLE (it looks its dictionary up by name), so it
+-- can't be used in an index expression. immutable_unaccent() pins the
+-- dictionary and is safe to index; queries.py searches compare
+-- immutable_unaccent(lower(col)) so the GIN indexes below serve both
+-- the LIKE filter and similarity() ranking.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION immutable_unaccent(text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE STRICT
+AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+$$;
+
+CREATE INDEX IF NOT EXISTS songs_title_trgm_idx
+    ON songs USING gin (immutable_unaccent(lower(title)) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS artists_name_trgm_idx
+    ON artists USING gin (immutable_unaccent(lower(name)) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS videos_title_trgm_idx
+    ON videos USING gin (immutable_unaccent(lower(title)) gin_trgm_ops);
@@ -0,0 +1,204 @@
+-- Full-text search over episode content.
+--
+-- Every video with episode text (battle description/rules/notes,
+-- overtime segments and items, stereotype segments, bucket list tasks)
+-- gets one row in video_search_documents: the plain text used for
+-- snippets and a weighted tsvector over it. Triggers on the source
+-- tables keep the row current, so a search only reads this table and
+-- its GIN index. Requires immutable_unaccent() from 001.
+
+CREATE TABLE IF NOT EXISTS video_search_documents (
+    video_id   integer PRIMARY KEY REFERENCES videos (id) ON DELETE CASCADE,
+    body       text NOT NULL,
+    document   tsvector NOT NULL,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS video_search_documents_document_idx
+    ON video_search_documents USING gin (document);
+
+
+-- =========================
+-- Document builder
+-- =========================
+--
+-- Weights: A = video title (ranking only, not part of the body),
+-- B = battle and episode-level text, C = segment, item and task text.
+
+CREATE OR REPLACE FUNCTION refresh_video_search_document(p_video_id integer)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_title text;
+    v_primary text;
+    v_detail text;
+BEGIN
+    SELECT title INTO v_title FROM videos WHERE id = p_video_id;
+
+    WITH parts (weight, content) AS (
+        -- Battles
+        SELECT 'B', concat_ws(E'\n', b.description, b.rules, b.notes)
+        FROM battles b
+        WHERE b.video_id = p_video_id
+
+        UNION ALL
+
+        -- Overtime segments and items
+        SELECT 'C', concat_ws(E'\n', os.title, os.notes)
+        FROM overtime_segments os
+        JOIN overtime_episodes e ON e.id = os.episode_id
+        WHERE e.video_id = p_video_id
+
+        UNION ALL
+
+        SELECT 'C', i.item_name
+        FROM overtime_segment_items i
+        JOIN overtime_segments os ON os.id = i.segment_id
+        JOIN overtime_episodes e  ON e.id = os.episode_id
+        WHERE e.video_id = p_video_id
+
+        UNION ALL
+
+        -- Stereotypes
+        SELECT 'B', e.theme
+        FROM stereotypes_episodes e
+        WHERE e.video_id = p_video_id
+
+        UNION ALL
+
+        SELECT 'C', concat_ws(E'\n', s.name, r.name, s.notes)
+        FROM stereotype_segments s
+        JOIN stereotypes_episodes e       ON e.id = s.episode_id
+        LEFT JOIN recurring_stereotypes r ON r.id = s.recurring_id
+        WHERE e.video_id = p_video_id
+
+        UNION ALL
+
+        -- Bucket list
+        SELECT 'C', concat_ws(E'\n', t.task_text, t.completion_note)
+        FROM bucket_list_tasks t
+        JOIN bucket_list_episodes e ON e.id = t.episode_id
+        WHERE e.video_id = p_video_id
+    )
+    SELECT
+        string_agg(content, E'\n') FILTER (WHERE weight = 'B'),
+        string_agg(content, E'\n') FILTER (WHERE weight = 'C')
+    INTO v_primary, v_detail
+    FROM parts
+    WHERE NULLIF(btrim(content), '') IS NOT NULL;
+
+    IF v_title IS NULL OR concat_ws(E'\n', v_primary, v_detail) = '' THEN
+        DELETE FROM video_search_documents WHERE video_id = p_video_id;
+        RETURN;
+    END IF;
+
+    INSERT INTO video_search_documents (video_id, body, document, updated_at)
+    VALUES (
+        p_video_id,
+        concat_ws(E'\n', v_primary, v_detail),
+        setweight(to_tsvector('english', immutable_unaccent(v_title)), 'A')
+            || setweight(to_tsvector('english', immutable_unaccent(coalesce(v_primary, ''))), 'B')
+            || setweight(to_tsvector('english', immutable_unaccent(coalesce(v_detail, ''))), 'C'),
+        now()
+    )
+    ON CONFLICT (video_id) DO UPDATE
+    SET body = EXCLUDED.body,
+        document = EXCLUDED.document,
+        updated_at = EXCLUDED.updated_at;
+END
+$$;
+
+
+-- =========================
+-- Maintenance triggers
+-- =========================
+--
+-- One trigger function for every source table: it resolves the video of
+-- the old and new row and rebuilds that video's document. Renaming a
+-- recurring stereotype is not tracked; run the backfill at the bottom
+-- of this file after bulk edits like that.
+
+CREATE OR REPLACE FUNCTION video_search_documents_touch()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    r jsonb;
+    v_video_id integer;
+BEGIN
+    FOREACH r IN ARRAY ARRAY[to_jsonb(OLD), to_jsonb(NEW)] LOOP
+        CONTINUE WHEN r IS NULL;
+
+        v_video_id := CASE TG_TABLE_NAME
+            WHEN 'videos' THEN (r->>'id')::integer
+            WHEN 'battles' THEN (r->>'video_id')::integer
+            WHEN 'overtime_episodes' THEN (r->>'video_id')::integer
+            WHEN 'stereotypes_episodes' THEN (r->>'video_id')::integer
+            WHEN 'bucket_list_episodes' THEN (r->>'video_id')::integer
+            WHEN 'overtime_segments' THEN (
+                SELECT video_id FROM overtime_episodes
+                WHERE id = (r->>'episode_id')::integer
+            )
+            WHEN 'overtime_segment_items' THEN (
+                SELECT e.video_id
+                FROM overtime_segments os
+                JOIN overtime_episodes e ON e.id = os.episode_id
+                WHERE os.id = (r->>'segment_id')::integer
+            )
+            WHEN 'stereotype_segments' THEN (
+                SELECT video_id FROM stereotypes_episodes
+                WHERE id = (r->>'episode_id')::integer
+            )
+            WHEN 'bucket_list_tasks' THEN (
+                SELECT video_id FROM bucket_list_episodes
+                WHERE id = (r->>'episode_id')::integer
+            )
+        END;
+
+        IF v_video_id IS NOT NULL THEN
+            PERFORM refresh_video_search_document(v_video_id);
+        END IF;
+    END LOOP;
+
+    RETURN NULL;
+END
+$$;
+
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'battles',
+        'overtime_episodes',
+        'overtime_segments',
+        'overtime_segment_items',
+        'stereotypes_episodes',
+        'stereotype_segments',
+        'bucket_list_episodes',
+        'bucket_list_tasks'
+    ] LOOP
+        EXECUTE format(
+            'DROP TRIGGER IF EXISTS %I ON %I', t || '_search_document', t
+        );
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE ON %I '
+            'FOR EACH ROW EXECUTE FUNCTION video_search_documents_touch()',
+            t || '_search_document', t
+        );
+    END LOOP;
+END
+$$;
+
+DROP TRIGGER IF EXISTS videos_search_document ON videos;
+CREATE TRIGGER videos_search_document
+    AFTER UPDATE OF title ON videos
+    FOR EACH ROW EXECUTE FUNCTION video_search_documents_touch();
+
+
+-- =========================
+-- Backfill
+-- =========================
+
+SELECT refresh_video_search_document(id) FROM videos;
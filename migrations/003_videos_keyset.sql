@@ -0,0 +1,8 @@
+-- Keyset pagination for /videos and /api/videos.
+--
+-- queries.get_videos_page() walks dated videos by (published_at, id)
+-- and undated ones by id; this index serves both directions of both
+-- ranges, so every page is a bounded index scan.
+
+CREATE INDEX IF NOT EXISTS videos_published_at_id_idx
+    ON videos (published_at DESC, id DESC);
@@ -0,0 +1,37 @@
+-- Letter-sharded song and artist listings.
+--
+-- letter_group is the unaccented first letter (A-Z, anything else is
+-- '#') and sort_key the unaccented, case-folded name. Both are stored
+-- generated columns, so listings read one letter as an index range in
+-- display order and the letter bar is an index-only GROUP BY. Requires
+-- immutable_unaccent() from 001.
+
+ALTER TABLE songs
+    ADD COLUMN IF NOT EXISTS letter_group text GENERATED ALWAYS AS (
+        CASE
+            WHEN upper(left(immutable_unaccent(title), 1)) ~ '^[A-Z]$'
+                THEN upper(left(immutable_unaccent(title), 1))
+            ELSE '#'
+        END
+    ) STORED,
+    ADD COLUMN IF NOT EXISTS sort_key text GENERATED ALWAYS AS (
+        lower(immutable_unaccent(title))
+    ) STORED;
+
+ALTER TABLE artists
+    ADD COLUMN IF NOT EXISTS letter_group text GENERATED ALWAYS AS (
+        CASE
+            WHEN upper(left(immutable_unaccent(name), 1)) ~ '^[A-Z]$'
+                THEN upper(left(immutable_unaccent(name), 1))
+            ELSE '#'
+        END
+    ) STORED,
+    ADD COLUMN IF NOT EXISTS sort_key text GENERATED ALWAYS AS (
+        lower(immutable_unaccent(name))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS songs_letter_group_sort_key_idx
+    ON songs (letter_group, sort_key, id);
+
+CREATE INDEX IF NOT EXISTS artists_letter_group_sort_key_idx
+    ON artists (letter_group, sort_key, id);
@@ -0,0 +1,195 @@
+-- Denormalized song counts on videos and artists.
+--
+-- videos.song_count is the number of distinct songs in video_songs for
+-- the video, artists.song_count the number of distinct songs credited
+-- to the artist in song_artists. Statement-level triggers adjust them
+-- from the transition tables on every write, so listings read a column
+-- instead of aggregating. refresh_song_counts() recomputes both in bulk
+-- and reports how many rows had drifted (queries.check_song_counts()
+-- and /admin/song-counts use it).
+
+ALTER TABLE videos
+    ADD COLUMN IF NOT EXISTS song_count integer NOT NULL DEFAULT 0;
+
+ALTER TABLE artists
+    ADD COLUMN IF NOT EXISTS song_count integer NOT NULL DEFAULT 0;
+
+
+-- =========================
+-- Bulk rebuild
+-- =========================
+
+CREATE OR REPLACE FUNCTION refresh_song_counts()
+RETURNS TABLE (counter text, fixed bigint)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH fixed_rows AS (
+        UPDATE videos v
+        SET song_count = c.n
+        FROM (
+            SELECT v2.id, COUNT(DISTINCT vs.song_id) AS n
+            FROM videos v2
+            LEFT JOIN video_songs vs ON vs.video_id = v2.id
+            GROUP BY v2.id
+        ) c
+        WHERE v.id = c.id
+          AND v.song_count <> c.n
+        RETURNING v.id
+    )
+    SELECT 'videos'::text, COUNT(*) FROM fixed_rows;
+
+    RETURN QUERY
+    WITH fixed_rows AS (
+        UPDATE artists a
+        SET song_count = c.n
+        FROM (
+            SELECT a2.id, COUNT(DISTINCT sa.song_id) AS n
+            FROM artists a2
+            LEFT JOIN song_artists sa ON sa.artist_id = a2.id
+            GROUP BY a2.id
+        ) c
+        WHERE a.id = c.id
+          AND a.song_count <> c.n
+        RETURNING a.id
+    )
+    SELECT 'artists'::text, COUNT(*) FROM fixed_rows;
+END
+$$;
+
+
+-- =========================
+-- Incremental maintenance
+-- =========================
+--
+-- One function serves both link tables; the trigger arguments name the
+-- counter table and the owner column (video_id / artist_id). Counts are
+-- of distinct songs: an insert only counts a (owner, song) pair that
+-- wasn't linked before the statement, a delete only one that is no
+-- longer linked after it. Updates are rare and recount their owners.
+
+CREATE OR REPLACE FUNCTION maintain_song_count()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    counter_table text := TG_ARGV[0];
+    owner_column text := TG_ARGV[1];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format($sql$
+            UPDATE %1$I t
+            SET song_count = t.song_count + d.n
+            FROM (
+                SELECT p.owner_id, COUNT(*) AS n
+                FROM (
+                    SELECT %2$I AS owner_id, song_id, COUNT(*) AS added
+                    FROM new_rows
+                    GROUP BY 1, 2
+                ) p
+                WHERE p.added = (
+                    SELECT COUNT(*)
+                    FROM %3$I l
+                    WHERE l.%2$I = p.owner_id
+                      AND l.song_id = p.song_id
+                )
+                GROUP BY p.owner_id
+            ) d
+            WHERE t.id = d.owner_id
+        $sql$, counter_table, owner_column, TG_TABLE_NAME);
+
+    ELSIF TG_OP = 'DELETE' THEN
+        EXECUTE format($sql$
+            UPDATE %1$I t
+            SET song_count = GREATEST(t.song_count - d.n, 0)
+            FROM (
+                SELECT p.owner_id, COUNT(*) AS n
+                FROM (
+                    SELECT DISTINCT %2$I AS owner_id, song_id
+                    FROM old_rows
+                ) p
+                WHERE NOT EXISTS (
+                    SELECT 1
+                    FROM %3$I l
+                    WHERE l.%2$I = p.owner_id
+                      AND l.song_id = p.song_id
+                )
+                GROUP BY p.owner_id
+            ) d
+            WHERE t.id = d.owner_id
+        $sql$, counter_table, owner_column, TG_TABLE_NAME);
+
+    ELSE
+        EXECUTE format($sql$
+            UPDATE %1$I t
+            SET song_count = (
+                SELECT COUNT(DISTINCT l.song_id)
+                FROM %3$I l
+                WHERE l.%2$I = t.id
+            )
+            WHERE t.id IN (
+                SELECT %2$I FROM old_rows
+                UNION
+                SELECT %2$I FROM new_rows
+            )
+        $sql$, counter_table, owner_column, TG_TABLE_NAME);
+    END IF;
+
+    RETURN NULL;
+END
+$$;
+
+DO $$
+DECLARE
+    link record;
+BEGIN
+    FOR link IN
+        SELECT * FROM (VALUES
+            ('video_songs', 'videos', 'video_id'),
+            ('song_artists', 'artists', 'artist_id')
+        ) AS l (link_table, counter_table, owner_column)
+    LOOP
+        EXECUTE format(
+            'DROP TRIGGER IF EXISTS %1$I ON %2$I;
+             DROP TRIGGER IF EXISTS %3$I ON %2$I;
+             DROP TRIGGER IF EXISTS %4$I ON %2$I',
+            link.link_table || '_count_insert',
+            link.link_table,
+            link.link_table || '_count_delete',
+            link.link_table || '_count_update'
+        );
+
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON %I
+             REFERENCING NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION maintain_song_count(%L, %L)',
+            link.link_table || '_count_insert', link.link_table,
+            link.counter_table, link.owner_column
+        );
+
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER DELETE ON %I
+             REFERENCING OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION maintain_song_count(%L, %L)',
+            link.link_table || '_count_delete', link.link_table,
+            link.counter_table, link.owner_column
+        );
+
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I
+             REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION maintain_song_count(%L, %L)',
+            link.link_table || '_count_update', link.link_table,
+            link.counter_table, link.owner_column
+        );
+    END LOOP;
+END
+$$;
+
+
+-- =========================
+-- Backfill
+-- =========================
+
+SELECT * FROM refresh_song_counts();
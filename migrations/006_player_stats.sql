@@ -0,0 +1,299 @@
+-- Precomputed player statistics.
+--
+-- battle_player_results resolves, once, how every battle_players row
+-- finished: its placement in the battle's final round (directly or
+-- through its team) and whether that counts as a win. Battles without
+-- recorded final-round results fall back to matching battles.winner
+-- against the team or player name, as the old player page did.
+--
+-- player_stats is a projection over it, keyed by player_id, so the
+-- player page is a primary-key lookup. refresh_player_stats() rebuilds
+-- the given players (or everyone) in one grouped pass, and triggers on
+-- the battle tables call refresh_battle_projections() for the battle
+-- that changed.
+
+-- =========================
+-- Battle results
+-- =========================
+
+CREATE OR REPLACE VIEW battle_player_results AS
+WITH final_rounds AS (
+    SELECT DISTINCT ON (br.battle_id)
+        br.battle_id,
+        br.id AS battle_round_id
+    FROM battle_rounds br
+    ORDER BY br.battle_id, br.round_order DESC, br.id DESC
+)
+SELECT
+    bp.battle_id,
+    bp.id AS battle_player_id,
+    bp.player_id,
+    bp.is_guest,
+    btm.team_id,
+    fp.placement AS final_placement,
+    COALESCE(
+        CASE
+            WHEN fp.placement IS NOT NULL THEN fp.placement = 1
+            WHEN bt.id IS NOT NULL THEN b.winner ILIKE '%' || bt.name || '%'
+            ELSE b.winner ILIKE '%' || p.name || '%'
+        END,
+        false
+    ) AS won
+FROM battle_players bp
+JOIN battles b
+    ON b.id = bp.battle_id
+JOIN players p
+    ON p.id = bp.player_id
+LEFT JOIN battle_team_members btm
+    ON btm.battle_player_id = bp.id
+LEFT JOIN battle_teams bt
+    ON bt.id = btm.team_id
+LEFT JOIN final_rounds fr
+    ON fr.battle_id = bp.battle_id
+LEFT JOIN LATERAL (
+    SELECT MIN(brp.placement) AS placement
+    FROM battle_round_participants brp
+    WHERE brp.battle_round_id = fr.battle_round_id
+      AND (
+          brp.battle_player_id = bp.id
+          OR brp.battle_team_id = btm.team_id
+      )
+) fp ON true;
+
+CREATE INDEX IF NOT EXISTS battle_players_player_id_idx
+    ON battle_players (player_id, battle_id);
+
+CREATE INDEX IF NOT EXISTS battle_round_participants_round_idx
+    ON battle_round_participants (battle_round_id);
+
+
+-- =========================
+-- Projection
+-- =========================
+
+CREATE TABLE IF NOT EXISTS player_stats (
+    player_id     integer PRIMARY KEY REFERENCES players (id) ON DELETE CASCADE,
+    battles       integer NOT NULL DEFAULT 0,
+    wins          integer NOT NULL DEFAULT 0,
+    guest_battles integer NOT NULL DEFAULT 0,
+    win_rate      numeric(4, 1),
+    appearances   integer NOT NULL DEFAULT 0,
+    round_types   jsonb NOT NULL DEFAULT '{}',
+    updated_at    timestamptz NOT NULL DEFAULT now()
+);
+
+-- appearances counts distinct videos a player shows up in: battles,
+-- stereotype segments and overtime items they presented. Only battle
+-- edits refresh a player automatically; after stereotype or overtime
+-- imports run SELECT refresh_player_stats() for everyone.
+-- round_types maps each round type to {"rounds", "wins"} (a round win
+-- is placement 1 in that round).
+
+CREATE OR REPLACE FUNCTION refresh_player_stats(p_player_ids integer[] DEFAULT NULL)
+RETURNS void
+LANGUAGE sql
+AS $$
+    WITH targets AS (
+        SELECT p.id AS player_id
+        FROM players p
+        WHERE p_player_ids IS NULL OR p.id = ANY(p_player_ids)
+    ),
+    battle_totals AS (
+        SELECT
+            r.player_id,
+            COUNT(DISTINCT r.battle_id) AS battles,
+            COUNT(DISTINCT r.battle_id) FILTER (WHERE r.won) AS wins,
+            COUNT(DISTINCT r.battle_id) FILTER (WHERE r.is_guest) AS guest_battles
+        FROM battle_player_results r
+        JOIN targets t ON t.player_id = r.player_id
+        GROUP BY r.player_id
+    ),
+    round_totals AS (
+        SELECT
+            x.player_id,
+            jsonb_object_agg(
+                x.round_type,
+                jsonb_build_object('rounds', x.rounds, 'wins', x.wins)
+            ) AS round_types
+        FROM (
+            SELECT
+                bp.player_id,
+                COALESCE(br.round_type, 'standard') AS round_type,
+                COUNT(DISTINCT br.id) AS rounds,
+                COUNT(DISTINCT br.id) FILTER (WHERE brp.placement = 1) AS wins
+            FROM battle_players bp
+            JOIN targets t
+                ON t.player_id = bp.player_id
+            LEFT JOIN battle_team_members btm
+                ON btm.battle_player_id = bp.id
+            JOIN battle_rounds br
+                ON br.battle_id = bp.battle_id
+            JOIN battle_round_participants brp
+                ON brp.battle_round_id = br.id
+               AND (
+                   brp.battle_player_id = bp.id
+                   OR brp.battle_team_id = btm.team_id
+               )
+            GROUP BY 1, 2
+        ) x
+        GROUP BY x.player_id
+    ),
+    appearance_totals AS (
+        SELECT a.player_id, COUNT(DISTINCT a.video_id) AS appearances
+        FROM (
+            SELECT bp.player_id, b.video_id
+            FROM battle_players bp
+            JOIN battles b ON b.id = bp.battle_id
+            WHERE bp.player_id IN (SELECT player_id FROM targets)
+
+            UNION ALL
+
+            SELECT ssp.player_id, e.video_id
+            FROM stereotype_segment_performers ssp
+            JOIN stereotype_segments s    ON s.id = ssp.segment_id
+            JOIN stereotypes_episodes e   ON e.id = s.episode_id
+            WHERE ssp.player_id IN (SELECT player_id FROM targets)
+
+            UNION ALL
+
+            SELECT i.presenter_id, e.video_id
+            FROM overtime_segment_items i
+            JOIN overtime_segments os     ON os.id = i.segment_id
+            JOIN overtime_episodes e      ON e.id = os.episode_id
+            WHERE i.presenter_id IN (SELECT player_id FROM targets)
+        ) a
+        GROUP BY a.player_id
+    )
+    INSERT INTO player_stats (
+        player_id, battles, wins, guest_battles, win_rate,
+        appearances, round_types, updated_at
+    )
+    SELECT
+        t.player_id,
+        COALESCE(bt.battles, 0),
+        COALESCE(bt.wins, 0),
+        COALESCE(bt.guest_battles, 0),
+        ROUND(bt.wins * 100.0 / NULLIF(bt.battles, 0), 1),
+        COALESCE(at.appearances, 0),
+        COALESCE(rt.round_types, '{}'),
+        now()
+    FROM targets t
+    LEFT JOIN battle_totals bt     ON bt.player_id = t.player_id
+    LEFT JOIN round_totals rt      ON rt.player_id = t.player_id
+    LEFT JOIN appearance_totals at ON at.player_id = t.player_id
+    ON CONFLICT (player_id) DO UPDATE
+    SET battles = EXCLUDED.battles,
+        wins = EXCLUDED.wins,
+        guest_battles = EXCLUDED.guest_battles,
+        win_rate = EXCLUDED.win_rate,
+        appearances = EXCLUDED.appearances,
+        round_types = EXCLUDED.round_types,
+        updated_at = EXCLUDED.updated_at;
+$$;
+
+
+-- =========================
+-- Per-battle refresh
+-- =========================
+--
+-- Every battle-derived projection is refreshed through this function;
+-- p_player_ids adds players who just left the battle.
+
+CREATE OR REPLACE FUNCTION refresh_battle_projections(
+    p_battle_id integer,
+    p_player_ids integer[] DEFAULT '{}'
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM refresh_player_stats(
+        ARRAY(
+            SELECT player_id FROM battle_players WHERE battle_id = p_battle_id
+            UNION
+            SELECT unnest(p_player_ids)
+        )
+    );
+END
+$$;
+
+CREATE OR REPLACE FUNCTION battle_projections_touch()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    r jsonb;
+    v_battle_id integer;
+    v_player_ids integer[];
+BEGIN
+    FOREACH r IN ARRAY ARRAY[to_jsonb(OLD), to_jsonb(NEW)] LOOP
+        CONTINUE WHEN r IS NULL;
+
+        v_player_ids := '{}';
+
+        CASE TG_TABLE_NAME
+            WHEN 'battles' THEN
+                v_battle_id := (r->>'id')::integer;
+            WHEN 'battle_players' THEN
+                v_battle_id := (r->>'battle_id')::integer;
+                v_player_ids := ARRAY[(r->>'player_id')::integer];
+            WHEN 'battle_teams', 'battle_rounds' THEN
+                v_battle_id := (r->>'battle_id')::integer;
+            WHEN 'battle_team_members' THEN
+                SELECT battle_id INTO v_battle_id
+                FROM battle_teams
+                WHERE id = (r->>'team_id')::integer;
+            WHEN 'battle_round_participants' THEN
+                SELECT battle_id INTO v_battle_id
+                FROM battle_rounds
+                WHERE id = (r->>'battle_round_id')::integer;
+            WHEN 'battle_round_matches' THEN
+                SELECT battle_id INTO v_battle_id
+                FROM battle_rounds
+                WHERE id = (r->>'battle_round_id')::integer;
+            WHEN 'battle_round_match_participants' THEN
+                SELECT br.battle_id INTO v_battle_id
+                FROM battle_round_matches m
+                JOIN battle_rounds br ON br.id = m.battle_round_id
+                WHERE m.id = (r->>'battle_round_match_id')::integer;
+        END CASE;
+
+        IF v_battle_id IS NOT NULL OR v_player_ids <> '{}' THEN
+            PERFORM refresh_battle_projections(v_battle_id, v_player_ids);
+        END IF;
+    END LOOP;
+
+    RETURN NULL;
+END
+$$;
+
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'battles',
+        'battle_players',
+        'battle_teams',
+        'battle_team_members',
+        'battle_rounds',
+        'battle_round_participants'
+    ] LOOP
+        EXECUTE format(
+            'DROP TRIGGER IF EXISTS %I ON %I', t || '_projections', t
+        );
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE ON %I '
+            'FOR EACH ROW EXECUTE FUNCTION battle_projections_touch()',
+            t || '_projections', t
+        );
+    END LOOP;
+END
+$$;
+
+
+-- =========================
+-- Backfill
+-- =========================
+
+SELECT refresh_player_stats();
@@ -0,0 +1,59 @@
+-- Player battle history.
+--
+-- queries.get_player_battles() pages a player's battles newest first:
+-- it picks the page from battle_players -> battles -> videos, then
+-- resolves placements through battle_player_results for those rows
+-- only. The view now finds each battle's final round with an indexed
+-- LATERAL lookup instead of ranking every round up front, so reading
+-- it for a handful of rows stays cheap.
+
+CREATE OR REPLACE VIEW battle_player_results AS
+SELECT
+    bp.battle_id,
+    bp.id AS battle_player_id,
+    bp.player_id,
+    bp.is_guest,
+    btm.team_id,
+    fp.placement AS final_placement,
+    COALESCE(
+        CASE
+            WHEN fp.placement IS NOT NULL THEN fp.placement = 1
+            WHEN bt.id IS NOT NULL THEN b.winner ILIKE '%' || bt.name || '%'
+            ELSE b.winner ILIKE '%' || p.name || '%'
+        END,
+        false
+    ) AS won
+FROM battle_players bp
+JOIN battles b
+    ON b.id = bp.battle_id
+JOIN players p
+    ON p.id = bp.player_id
+LEFT JOIN battle_team_members btm
+    ON btm.battle_player_id = bp.id
+LEFT JOIN battle_teams bt
+    ON bt.id = btm.team_id
+LEFT JOIN LATERAL (
+    SELECT br.id AS battle_round_id
+    FROM battle_rounds br
+    WHERE br.battle_id = bp.battle_id
+    ORDER BY br.round_order DESC, br.id DESC
+    LIMIT 1
+) fr ON true
+LEFT JOIN LATERAL (
+    SELECT MIN(brp.placement) AS placement
+    FROM battle_round_participants brp
+    WHERE brp.battle_round_id = fr.battle_round_id
+      AND (
+          brp.battle_player_id = bp.id
+          OR brp.battle_team_id = btm.team_id
+      )
+) fp ON true;
+
+CREATE INDEX IF NOT EXISTS battle_rounds_battle_order_idx
+    ON battle_rounds (battle_id, round_order DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS battles_video_id_idx
+    ON battles (video_id);
+
+CREATE INDEX IF NOT EXISTS battle_team_members_battle_player_idx
+    ON battle_team_members (battle_player_id);
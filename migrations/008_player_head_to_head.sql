@@ -0,0 +1,179 @@
+-- Head-to-head player matrix.
+--
+-- One row per pair of players who have shared a battle, stored once
+-- with player_a < player_b. Battle outcomes compare final placements
+-- from battle_player_results (falling back to the won flags);
+-- teammates neither win nor lose against each other. Match outcomes
+-- compare placements inside battle_round_matches both players (or
+-- their teams) took part in.
+--
+-- refresh_head_to_head() rebuilds every pair among the given players
+-- (or the whole matrix) in one grouped pass; refresh_battle_projections()
+-- now calls it for the players of a changed battle, so adding a battle
+-- only recomputes the pairs it touches.
+
+CREATE TABLE IF NOT EXISTS player_head_to_head (
+    player_a       integer NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    player_b       integer NOT NULL REFERENCES players (id) ON DELETE CASCADE,
+    shared_battles integer NOT NULL DEFAULT 0,
+    a_wins         integer NOT NULL DEFAULT 0,
+    b_wins         integer NOT NULL DEFAULT 0,
+    matches        integer NOT NULL DEFAULT 0,
+    a_match_wins   integer NOT NULL DEFAULT 0,
+    b_match_wins   integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (player_a, player_b),
+    CHECK (player_a < player_b)
+);
+
+CREATE INDEX IF NOT EXISTS player_head_to_head_player_b_idx
+    ON player_head_to_head (player_b);
+
+CREATE INDEX IF NOT EXISTS battle_round_match_participants_match_idx
+    ON battle_round_match_participants (battle_round_match_id);
+
+
+-- =========================
+-- Batch build
+-- =========================
+
+CREATE OR REPLACE FUNCTION refresh_head_to_head(p_player_ids integer[] DEFAULT NULL)
+RETURNS void
+LANGUAGE sql
+AS $$
+    DELETE FROM player_head_to_head
+    WHERE p_player_ids IS NULL
+       OR (player_a = ANY(p_player_ids) AND player_b = ANY(p_player_ids));
+
+    WITH results AS (
+        SELECT DISTINCT ON (r.battle_id, r.player_id)
+            r.battle_id,
+            r.player_id,
+            r.team_id,
+            r.final_placement,
+            r.won
+        FROM battle_player_results r
+        WHERE p_player_ids IS NULL OR r.player_id = ANY(p_player_ids)
+        ORDER BY r.battle_id, r.player_id, r.final_placement NULLS LAST
+    ),
+    battle_pairs AS (
+        SELECT
+            a.player_id AS player_a,
+            b.player_id AS player_b,
+            COUNT(*) AS shared_battles,
+            COUNT(*) FILTER (WHERE x.outcome > 0) AS a_wins,
+            COUNT(*) FILTER (WHERE x.outcome < 0) AS b_wins
+        FROM results a
+        JOIN results b
+            ON b.battle_id = a.battle_id
+           AND b.player_id > a.player_id
+        CROSS JOIN LATERAL (
+            SELECT CASE
+                WHEN a.team_id = b.team_id THEN 0
+                WHEN a.final_placement IS NOT NULL
+                 AND b.final_placement IS NOT NULL
+                    THEN sign(b.final_placement - a.final_placement)
+                WHEN a.won AND NOT b.won THEN 1
+                WHEN b.won AND NOT a.won THEN -1
+                ELSE 0
+            END AS outcome
+        ) x
+        GROUP BY 1, 2
+    ),
+    match_players AS (
+        SELECT DISTINCT ON (brmp.battle_round_match_id, bp.player_id)
+            brmp.battle_round_match_id AS match_id,
+            bp.player_id,
+            brmp.placement
+        FROM battle_round_match_participants brmp
+        LEFT JOIN battle_team_members btm
+            ON btm.team_id = brmp.battle_team_id
+        JOIN battle_players bp
+            ON bp.id = COALESCE(brmp.battle_player_id, btm.battle_player_id)
+        WHERE p_player_ids IS NULL OR bp.player_id = ANY(p_player_ids)
+        ORDER BY brmp.battle_round_match_id, bp.player_id, brmp.placement NULLS LAST
+    ),
+    match_pairs AS (
+        SELECT
+            a.player_id AS player_a,
+            b.player_id AS player_b,
+            COUNT(*) AS matches,
+            COUNT(*) FILTER (WHERE a.placement < b.placement) AS a_match_wins,
+            COUNT(*) FILTER (WHERE b.placement < a.placement) AS b_match_wins
+        FROM match_players a
+        JOIN match_players b
+            ON b.match_id = a.match_id
+           AND b.player_id > a.player_id
+        GROUP BY 1, 2
+    )
+    INSERT INTO player_head_to_head (
+        player_a, player_b, shared_battles, a_wins, b_wins,
+        matches, a_match_wins, b_match_wins
+    )
+    SELECT
+        bp.player_a,
+        bp.player_b,
+        bp.shared_battles,
+        bp.a_wins,
+        bp.b_wins,
+        COALESCE(mp.matches, 0),
+        COALESCE(mp.a_match_wins, 0),
+        COALESCE(mp.b_match_wins, 0)
+    FROM battle_pairs bp
+    LEFT JOIN match_pairs mp
+        ON mp.player_a = bp.player_a
+       AND mp.player_b = bp.player_b;
+$$;
+
+
+-- =========================
+-- Per-battle refresh
+-- =========================
+
+CREATE OR REPLACE FUNCTION refresh_battle_projections(
+    p_battle_id integer,
+    p_player_ids integer[] DEFAULT '{}'
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_player_ids integer[];
+BEGIN
+    v_player_ids := ARRAY(
+        SELECT player_id FROM battle_players WHERE battle_id = p_battle_id
+        UNION
+        SELECT unnest(p_player_ids)
+    );
+
+    PERFORM refresh_player_stats(v_player_ids);
+    PERFORM refresh_head_to_head(v_player_ids);
+END
+$$;
+
+-- Match results feed the matrix, so match edits refresh too.
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'battle_round_matches',
+        'battle_round_match_participants'
+    ] LOOP
+        EXECUTE format(
+            'DROP TRIGGER IF EXISTS %I ON %I', t || '_projections', t
+        );
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE ON %I '
+            'FOR EACH ROW EXECUTE FUNCTION battle_projections_touch()',
+            t || '_projections', t
+        );
+    END LOOP;
+END
+$$;
+
+
+-- =========================
+-- Backfill
+-- =========================
+
+SELECT refresh_head_to_head();
@@ -0,0 +1,113 @@
+-- Player battle history as an index range scan.
+--
+-- queries.get_player_battles() used to pick its page by joining every
+-- battle_players row of the player to battles and videos and sorting on
+-- videos.published_at, so the cost grew with the player's history.
+-- battle_players now carries a copy of its video's published_at, kept
+-- current by triggers on battle_players, battles and videos, and the
+-- (player_id, published_at DESC NULLS LAST, battle_id DESC) index lets
+-- a keyset page read exactly the rows it returns.
+
+-- Same type as videos.published_at, whatever that is.
+DO $$
+BEGIN
+    EXECUTE format(
+        'ALTER TABLE battle_players ADD COLUMN IF NOT EXISTS published_at %s',
+        (
+            SELECT format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = 'videos'::regclass
+              AND attname = 'published_at'
+        )
+    );
+END
+$$;
+
+CREATE INDEX IF NOT EXISTS battle_players_player_history_idx
+    ON battle_players (player_id, published_at DESC NULLS LAST, battle_id DESC);
+
+
+-- =========================
+-- Maintenance triggers
+-- =========================
+
+CREATE OR REPLACE FUNCTION battle_players_set_published_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    SELECT v.published_at INTO NEW.published_at
+    FROM battles b
+    JOIN videos v ON v.id = b.video_id
+    WHERE b.id = NEW.battle_id;
+
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS battle_players_published_at ON battle_players;
+CREATE TRIGGER battle_players_published_at
+    BEFORE INSERT OR UPDATE OF battle_id ON battle_players
+    FOR EACH ROW EXECUTE FUNCTION battle_players_set_published_at();
+
+CREATE OR REPLACE FUNCTION battle_players_published_at_touch()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    CASE TG_TABLE_NAME
+        WHEN 'battles' THEN
+            UPDATE battle_players bp
+            SET published_at = v.published_at
+            FROM videos v
+            WHERE bp.battle_id = NEW.id
+              AND v.id = NEW.video_id
+              AND bp.published_at IS DISTINCT FROM v.published_at;
+        WHEN 'videos' THEN
+            UPDATE battle_players bp
+            SET published_at = NEW.published_at
+            FROM battles b
+            WHERE b.video_id = NEW.id
+              AND bp.battle_id = b.id
+              AND bp.published_at IS DISTINCT FROM NEW.published_at;
+    END CASE;
+
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS battles_published_at ON battles;
+CREATE TRIGGER battles_published_at
+    AFTER UPDATE OF video_id ON battles
+    FOR EACH ROW EXECUTE FUNCTION battle_players_published_at_touch();
+
+DROP TRIGGER IF EXISTS videos_battle_published_at ON videos;
+CREATE TRIGGER videos_battle_published_at
+    AFTER UPDATE OF published_at ON videos
+    FOR EACH ROW EXECUTE FUNCTION battle_players_published_at_touch();
+
+-- Copying the date onto battle_players is not a battle edit: skip the
+-- projection refresh from 006 when published_at is all that changed.
+DROP TRIGGER IF EXISTS battle_players_projections ON battle_players;
+CREATE TRIGGER battle_players_projections
+    AFTER INSERT OR DELETE ON battle_players
+    FOR EACH ROW EXECUTE FUNCTION battle_projections_touch();
+
+DROP TRIGGER IF EXISTS battle_players_projections_update ON battle_players;
+CREATE TRIGGER battle_players_projections_update
+    AFTER UPDATE ON battle_players
+    FOR EACH ROW
+    WHEN ((to_jsonb(OLD) - 'published_at') IS DISTINCT FROM (to_jsonb(NEW) - 'published_at'))
+    EXECUTE FUNCTION battle_projections_touch();
+
+
+-- =========================
+-- Backfill
+-- =========================
+
+UPDATE battle_players bp
+SET published_at = v.published_at
+FROM battles b
+JOIN videos v ON v.id = b.video_id
+WHERE b.id = bp.battle_id
+  AND bp.published_at IS DISTINCT FROM v.published_at;